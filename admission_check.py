@@ -0,0 +1,142 @@
+"""In-process check that admission control keeps exits moving under an entry flood.
+
+First drives AdmissionController directly with simulated work: a flood of
+slow entries and info alerts saturates capacity and the waiting queue while
+short exits arrive at a steady pace. Then imports main.py pointed at the
+loadtest.py stubs with ADMISSION_CAPACITY set and repeats the flood through
+the Flask test client, where entries are slow because of Groq latency. Both
+parts require that no exit is shed, that each exit waits less than a fixed
+bound, and that the flood really saturated the controller (entries shed).
+
+    python admission_check.py
+"""
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+import loadtest
+
+GROQ_LATENCY_MS = 1500
+failures = []
+
+
+def check(label, ok, detail=''):
+    print(f"[{'PASS' if ok else 'FAIL'}] {label}{f' - {detail}' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+
+def flood(n_entries, n_info, n_exits, entry, info, exit_):
+    """Runs the callables on their own threads; exits are spaced 50ms apart
+    and start once the entries are already queued. Returns exit results."""
+    exits = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=entry) for _ in range(n_entries)]
+    threads += [threading.Thread(target=info) for _ in range(n_info)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+
+    def run_exit():
+        result = exit_()
+        with lock:
+            exits.append(result)
+
+    exit_threads = []
+    for _ in range(n_exits):
+        thread = threading.Thread(target=run_exit)
+        thread.start()
+        exit_threads.append(thread)
+        time.sleep(0.05)
+    for thread in threads + exit_threads:
+        thread.join()
+    return exits
+
+
+def check_controller(main):
+    # capacity 6 with the default split: entry=3, info=1, so at least two
+    # slots are always left for exits and trend changes
+    controller = main.AdmissionController(
+        capacity=6, limits=main.parse_admission_limits('', 6), max_waiting=8, wait_seconds=5
+    )
+    exit_cls = main.PRIORITY_CLASSES.index('exit')
+
+    def work(cls, seconds):
+        def run():
+            started = time.perf_counter()
+            if not controller.acquire(cls):
+                return False, time.perf_counter() - started
+            waited = time.perf_counter() - started
+            time.sleep(seconds)
+            controller.release(cls)
+            return True, waited
+        return run
+
+    exits = flood(60, 20, 20, work(2, 0.3), work(3, 0.3), work(exit_cls, 0.05))
+    stats = controller.get_stats()['classes']
+    waits = [waited for admitted, waited in exits if admitted]
+    check('controller: entries saturated the queue', stats['entry']['shed'] > 0, f"entry shed={stats['entry']['shed']}")
+    check('controller: no exit was shed', len(waits) == len(exits), f'{len(exits) - len(waits)} shed')
+    check('controller: exit wait stays under 100ms', bool(waits) and max(waits) < 0.1, f'max {max(waits, default=0) * 1000:.1f}ms')
+    check('controller: all slots released', all(c['in_flight'] == 0 and c['waiting'] == 0 for c in stats.values()))
+
+
+def check_app(main):
+    client_lock = threading.Lock()
+
+    def post(payload):
+        def run():
+            with client_lock:
+                client = main.app.test_client()
+            started = time.perf_counter()
+            status = client.post('/webhook', json=payload).status_code
+            return status, time.perf_counter() - started
+        return run
+
+    tickers = iter(loadtest.make_tickers(60))
+    entries = [post({'alert_type': 'breakout', 'ticker': next(tickers), 'tf': '15m', 'direction': 'BUY',
+                     'price': '1.1000', 'tp': '1.1060', 'sl': '1.0970'}) for _ in range(40)]
+    entries = iter(entries)
+    # clients are built up front so exit latency measures admission, not imports;
+    # the app's per-alert logging is muted for the flood
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.warm_up()
+        exits = flood(40, 0, 15, lambda: next(entries)(), lambda: None,
+                      post({'ticker': 'EXITPROBE', 'hit': 'SL HIT', 'price': '1.0970'}))
+    stats = main.admission.get_stats()['classes']
+    latencies = [latency for status, latency in exits if status == 200]
+    check('app: entry flood was shed', stats['entry']['shed'] > 0, f"entry shed={stats['entry']['shed']}")
+    check('app: every exit answered 200', len(latencies) == len(exits), str(sorted(status for status, _ in exits)))
+    check('app: exit latency stays under 250ms', bool(latencies) and max(latencies) < 0.25,
+          f'max {max(latencies, default=0) * 1000:.0f}ms while entries take ~{GROQ_LATENCY_MS}ms in Groq')
+
+
+def main():
+    stubs = {
+        'telegram': loadtest.TelegramStub(latency_ms=20),
+        'groq': loadtest.GroqStub(latency_ms=GROQ_LATENCY_MS),
+        'investing': loadtest.CalendarStub('investing', loadtest.INVESTING_HTML),
+        'forexfactory': loadtest.CalendarStub('forexfactory', loadtest.FOREXFACTORY_HTML),
+    }
+    os.environ.update(loadtest.app_env(stubs, {
+        'ADMISSION_CAPACITY': '6',
+        'ADMISSION_MAX_WAITING': '8',
+        'ADMISSION_WAIT_SECONDS': '10',
+        'DESTINATIONS': '',
+    }))
+    import main as app_main
+
+    check_controller(app_main)
+    check_app(app_main)
+
+    for stub in stubs.values():
+        stub.close()
+    print(f"\n{'FAILED: ' + ', '.join(failures) if failures else 'ALL CHECKS PASSED'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
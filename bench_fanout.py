@@ -0,0 +1,140 @@
+"""Benchmark multi-destination fan-out against local stubs.
+
+Boots main.py under gunicorn three times against the loadtest.py stubs: once
+with no extra destinations (baseline), then with --destinations fan-out
+targets, first all healthy and then with some deliberately slow or dead. The
+same alert schedule is replayed each time. The report compares /webhook latency, then shows how
+healthy destinations fared next to the broken ones. The all-healthy run is
+the reference for isolation: the "ok" group should look the same with and
+without dead or slow neighbours. Stubs, driver and app share this machine, so
+on few cores the absolute numbers are CPU-bound.
+
+    python bench_fanout.py --destinations 60 --dead 4 --slow 4
+"""
+import argparse
+import json
+import time
+
+import requests
+
+import loadtest
+
+
+def build_destinations(args, n_dead, n_slow, sink_url, slow_sink_url, dead_url):
+    destinations = []
+    n_webhook = args.destinations // 4
+    for i in range(args.destinations):
+        is_webhook = i < n_webhook
+        dead = i % (args.destinations // n_dead) == 1 if n_dead else False
+        slow = i % (args.destinations // n_slow) == 2 if n_slow else False
+        health = 'dead' if dead else 'slow' if slow else 'ok'
+        config = {
+            'name': f"{'hook' if is_webhook else 'chat'}-{i:02d}-{health}",
+            'rate_per_minute': args.rate_per_minute,
+            'burst': 10,
+            'max_retries': 2,
+            'retry_backoff': 0.5,
+            'failure_threshold': 5,
+            'cooldown_seconds': 30,
+            'timeout': 5,
+        }
+        if is_webhook:
+            config.update(type='webhook', url=dead_url if dead else slow_sink_url if slow else sink_url)
+        else:
+            # broken chats get their own ids so the stub can fail them without
+            # touching the all-healthy run
+            config.update(type='telegram', chat_id=str((-1000 if health == 'ok' else -2000) - i))
+        if i % 5 == 4:
+            config['strategies'] = ['Ribbon Breakout']
+        destinations.append(config)
+    return destinations
+
+
+def run(label, stubs, schedule, env, args):
+    for stub in stubs.values():
+        stub.reset()
+    proc, base_url = loadtest.start_app(1, args.threads, stubs, env)
+    try:
+        results, elapsed = loadtest.drive(base_url, schedule, 64, 60)
+        started = time.time()
+        stats = {}
+        while time.time() - started < args.drain:
+            stats = requests.get(f'{base_url}/destinations', timeout=5).json()['destinations']
+            healthy = [s for name, s in stats.items() if name.endswith('-ok')]
+            if all(s['queued'] == 0 for s in healthy):
+                break
+            time.sleep(0.25)
+        drained = time.time() - started
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    latencies = [lat * 1000 for status, lat, _ in results if status is not None]
+    print(f"\n=== {label} ===")
+    print(f"/webhook: {len(results)} requests in {elapsed:.1f}s, "
+          f"p50 {loadtest.percentile(latencies, 50):.0f}ms  p99 {loadtest.percentile(latencies, 99):.0f}ms  "
+          f"5xx {sum(1 for s, _, _ in results if s is not None and s >= 500)}")
+    if not stats:
+        return
+
+    delivered = sum(s['delivered'] for s in stats.values())
+    print(f"fan-out: {delivered} deliveries to {len(stats)} destinations, healthy queues drained {drained:.1f}s after the last request")
+    print(f"{'group':<10} {'dests':>5} {'delivered':>9} {'failed':>6} {'dropped':>7} {'retries':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for group in ('ok', 'slow', 'dead'):
+        members = [s for name, s in stats.items() if name.endswith(f'-{group}')]
+        if not members:
+            continue
+        p50s = [s['p50_ms'] for s in members if s['p50_ms'] is not None]
+        p99s = [s['p99_ms'] for s in members if s['p99_ms'] is not None]
+        print(f"{group:<10} {len(members):>5} {sum(s['delivered'] for s in members):>9} "
+              f"{sum(s['failed'] for s in members):>6} {sum(s['dropped'] for s in members):>7} "
+              f"{sum(s['retries'] for s in members):>7} "
+              f"{(max(p50s) if p50s else 0):>8.0f} {(max(p99s) if p99s else 0):>8.0f}")
+    print("(p50/p99 columns are the worst destination in each group, measured from publish to delivery)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark multi-destination fan-out against local stubs.')
+    parser.add_argument('--destinations', type=int, default=60)
+    parser.add_argument('--dead', type=int, default=4, help='destinations that always fail')
+    parser.add_argument('--slow', type=int, default=4, help='destinations that take --slow-ms per send')
+    parser.add_argument('--slow-ms', type=float, default=2000)
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--bars', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=50.0)
+    parser.add_argument('--rate-per-minute', type=float, default=3000, help='per-destination send budget')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--drain', type=float, default=60.0, help='max seconds to wait for healthy queues')
+    args = parser.parse_args()
+
+    sink = loadtest.SinkStub('sink', latency_ms=20)
+    slow_sink = loadtest.SinkStub('slow-sink', latency_ms=args.slow_ms)
+    dead_url = f'http://127.0.0.1:{loadtest.free_port()}/closed'
+    stubs = {
+        'telegram': loadtest.TelegramStub(latency_ms=30),
+        'groq': loadtest.GroqStub(latency_ms=100),
+        'investing': loadtest.CalendarStub('investing', loadtest.INVESTING_HTML),
+        'forexfactory': loadtest.CalendarStub('forexfactory', loadtest.FOREXFACTORY_HTML),
+        'sink': sink,
+        'slow-sink': slow_sink,
+    }
+    healthy = build_destinations(args, 0, 0, sink.url + '/hook', slow_sink.url + '/hook', dead_url)
+    destinations = build_destinations(args, args.dead, args.slow, sink.url + '/hook', slow_sink.url + '/hook', dead_url)
+    stubs['telegram'].dead_chats = {d['chat_id'] for d in destinations if d['type'] == 'telegram' and d['name'].endswith('-dead')}
+    stubs['telegram'].slow_chats = {d['chat_id']: args.slow_ms for d in destinations if d['type'] == 'telegram' and d['name'].endswith('-slow')}
+
+    schedule, _ = loadtest.build_schedule(loadtest.make_tickers(args.tickers), args.bars, args.rate, 0.5, 0.0, 1)
+    print(f"{len(schedule)} alerts, {len(destinations)} destinations "
+          f"({sum(1 for d in destinations if d['name'].endswith('-dead'))} dead, "
+          f"{sum(1 for d in destinations if d['name'].endswith('-slow'))} slow at {args.slow_ms:.0f}ms)")
+
+    run('baseline: primary channel only', stubs, schedule, {}, args)
+    run(f'fan-out: {len(healthy)} healthy destinations', stubs, schedule, {'DESTINATIONS': json.dumps(healthy)}, args)
+    run(f'fan-out: {len(destinations)} destinations, some dead or slow', stubs, schedule, {'DESTINATIONS': json.dumps(destinations)}, args)
+
+    for stub in stubs.values():
+        stub.close()
+
+
+if __name__ == '__main__':
+    main()
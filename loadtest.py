@@ -0,0 +1,501 @@
+"""Load-test harness for the /webhook endpoint.
+
+Starts local stand-ins for the Telegram Bot API, the Groq chat completions
+endpoint and the two calendar pages, boots main.py under gunicorn for each
+worker/thread configuration pointed at those stubs, replays bar-close bursts
+across N tickers and reports throughput, latency percentiles, 5xx counts and
+duplicate Telegram posts.
+
+    python loadtest.py --tickers 30 --bars 8 --rate 200 --configs 1x1,1x8,4x4
+    python loadtest.py --tg-latency 300 --groq-latency 1500 --groq-error-rate 0.1
+    python loadtest.py --target http://127.0.0.1:5000   # drive an app you started yourself
+    python loadtest.py --entry-flood 0.9 --configs 1x32 --env ADMISSION_CAPACITY=8
+
+main.py is redirected to the stubs through TELEGRAM_API_URL, GROQ_BASE_URL,
+INVESTING_CALENDAR_URL and FOREXFACTORY_CALENDAR_URL.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from priority import PRIORITY_CLASSES, alert_priority
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# --- STUB SERVERS ---
+class StubServer:
+    """Threaded HTTP server with configurable latency (ms) and error rate."""
+
+    def __init__(self, name, latency_ms=0, error_rate=0.0, jitter=0.25):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # headers and body go out in separate writes; without TCP_NODELAY a
+            # kept-alive client stalls ~40ms on each response (delayed ACK)
+            disable_nagle_algorithm = True
+
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                stub.sleep()
+                if random.random() < stub.error_rate:
+                    status, payload, ctype = stub.error_response()
+                else:
+                    status, payload, ctype = stub.handle(self.command, self.path, body)
+                with stub.lock:
+                    stub.calls[(urlparse(self.path).path.rsplit('/', 1)[-1] or '/', status)] += 1
+                data = payload if isinstance(payload, bytes) else payload.encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', ctype)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # client gave up (timeout or the app under test was stopped)
+                    pass
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def sleep(self):
+        if self.latency_ms:
+            spread = self.latency_ms * self.jitter
+            time.sleep(max(0, random.uniform(self.latency_ms - spread, self.latency_ms + spread)) / 1000)
+
+    def error_response(self):
+        return 500, json.dumps({'error': 'stub failure'}), 'application/json'
+
+    def handle(self, method, path, body):
+        raise NotImplementedError
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+
+    def close(self):
+        self.server.shutdown()
+
+
+class TelegramStub(StubServer):
+    def __init__(self, dead_chats=(), slow_chats=None, **kwargs):
+        super().__init__('telegram', **kwargs)
+        self.next_id = 1
+        self.posts = []
+        self.edits = []
+        self.dead_chats = set(dead_chats)
+        self.slow_chats = slow_chats or {}
+
+    def error_response(self):
+        return 500, json.dumps({'ok': False, 'error_code': 500, 'description': 'Internal Server Error'}), 'application/json'
+
+    def handle(self, method, path, body):
+        api_method = urlparse(path).path.rsplit('/', 1)[-1]
+        params = {k: v[0] for k, v in parse_qs(urlparse(path).query).items()}
+        if body:
+            params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+
+        if api_method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'stub', 'username': 'stub_bot'}
+            return 200, json.dumps({'ok': True, 'result': result}), 'application/json'
+
+        chat_id = params.get('chat_id')
+        if chat_id in self.slow_chats:
+            time.sleep(self.slow_chats[chat_id] / 1000)
+        if chat_id in self.dead_chats:
+            return self.error_response()
+
+        if len(params.get('text', '').encode('utf-16-le')) // 2 > 4096:
+            return 400, json.dumps({'ok': False, 'error_code': 400, 'description': 'Bad Request: message is too long'}), 'application/json'
+
+        with self.lock:
+            message_id = int(params.get('message_id') or 0) or self.next_id
+            if api_method == 'sendMessage':
+                self.next_id += 1
+                self.posts.append(params)
+            elif api_method == 'editMessageText':
+                self.edits.append(params)
+
+        result = {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(params.get('chat_id') or 0), 'type': 'channel'},
+            'text': params.get('text', '')
+        }
+        return 200, json.dumps({'ok': True, 'result': result}), 'application/json'
+
+    def reset(self):
+        super().reset()
+        with self.lock:
+            self.posts = []
+            self.edits = []
+
+
+class GroqStub(StubServer):
+    def __init__(self, **kwargs):
+        super().__init__('groq', **kwargs)
+
+    def handle(self, method, path, body):
+        if path.endswith('/models'):
+            return 200, json.dumps({'object': 'list', 'data': []}), 'application/json'
+        content = 'Win Probability: 75%\nTrade Rating: 7/10\nAnalysis: Stub analysis.'
+        if b'HOLD or CLOSE' in body:
+            content = 'Suggestion: HOLD - Stub momentum'
+        return 200, json.dumps({
+            'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': 'llama-3.3-70b-versatile',
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+        }), 'application/json'
+
+
+class SinkStub(StubServer):
+    """Webhook sink that records every JSON body it receives."""
+
+    def __init__(self, name='sink', **kwargs):
+        super().__init__(name, **kwargs)
+        self.received = []
+
+    def handle(self, method, path, body):
+        with self.lock:
+            self.received.append((path, body))
+        return 200, json.dumps({'ok': True}), 'application/json'
+
+    def reset(self):
+        super().reset()
+        with self.lock:
+            self.received = []
+
+
+INVESTING_HTML = (
+    '<table>' + ''.join(
+        '<tr class="js-event-item"><td class="sentiment"><i class="grayFullBullishIcon"></i></td>'
+        f'<td class="event">Event {i}</td></tr>' for i in range(25)
+    ) + '</table>'
+)
+FOREXFACTORY_HTML = (
+    '<table>' + ''.join(
+        f'<tr><td><span class="high"></span></td><td><span class="calendar__event-title">Event {i}</span></td></tr>'
+        for i in range(15)
+    ) + '</table>'
+)
+
+class CalendarStub(StubServer):
+    def __init__(self, name, html, **kwargs):
+        super().__init__(name, **kwargs)
+        self.html = html
+
+    def handle(self, method, path, body):
+        return 200, self.html, 'text/html'
+
+
+# --- WORKLOAD ---
+LIFECYCLE = ['cluster_formed', 'confirmed', 'breakout_due', 'breakout', 'be', 'tp1', 'tp2', 'exit']
+
+HEADER_KINDS = [
+    ('🔵 CLUSTER', 'cluster_formed'),
+    ('✅ CONFIRM', 'confirmed'),
+    ('⚡ BREAKOUT', 'breakout_due'),
+    ('🚀 BREAKOUT', 'breakout'),
+    ('⚠️ TREND', 'trend_change'),
+    ('🛡️ BREAK-EVEN', 'be'),
+    ('TP1', 'tp1'),
+    ('TP2', 'tp2'),
+    ('TP3', 'exit'),
+    ('SL', 'exit'),
+]
+
+def make_tickers(n):
+    majors = ['EUR', 'GBP', 'USD', 'JPY', 'AUD', 'NZD', 'CAD', 'CHF']
+    pairs = [a + b for a in majors for b in majors if a != b]
+    return [pairs[i] if i < len(pairs) else f'SYM{i}' for i in range(n)]
+
+def make_payload(ticker, stage, rng):
+    price = round(1 + rng.random(), 4)
+    direction = rng.choice(['BUY', 'SELL'])
+    if stage == 'cluster_formed':
+        return {'alert_type': 'cluster_formed', 'ticker': ticker, 'tf': '15m', 'direction': direction, 'price': price, 'spread': '0.18'}
+    if stage == 'confirmed':
+        return {'alert_type': 'confirmed', 'ticker': ticker, 'tf': '15m', 'direction': direction, 'price': price}
+    if stage == 'breakout_due':
+        return {'alert_type': 'breakout_due', 'ticker': ticker, 'tf': '15m', 'direction': direction, 'spread': '0.32'}
+    if stage == 'breakout':
+        return {'alert_type': 'breakout', 'ticker': ticker, 'tf': '15m', 'direction': direction, 'price': price,
+                'tp': round(price + 0.006, 4), 'sl': round(price - 0.003, 4), 'market_condition': 'NORMAL',
+                'stoch_k': '45.2', 'stoch_4h': '62.8'}
+    if stage == 'be':
+        return {'ticker': ticker, 'status': 'MOVED TO BE', 'price': price}
+    if stage == 'tp1':
+        return {'ticker': ticker, 'hit': 'TP1 HIT', 'price': price}
+    if stage == 'tp2':
+        return {'ticker': ticker, 'hit': 'TP2 HIT', 'price': price}
+    if stage == 'trend_change':
+        return {'alert_type': 'trend_change', 'ticker': ticker, 'tf': '15m', 'original_direction': direction, 'advice': 'CLOSE', 'price': price}
+    return {'ticker': ticker, 'hit': rng.choice(['TP3 HIT', 'TP3 HIT', 'SL HIT']), 'price': price}
+
+def build_schedule(tickers, bars, rate, bar_gap, retry_rate, seed, entry_flood=0.0):
+    """One burst per bar close: every ticker advances one lifecycle stage.
+
+    Returns [(offset_seconds, payload, is_retry)] plus the count of unique
+    alerts per (ticker, kind) that should each produce at most one post.
+    entry_flood replaces that share of pre-trade alerts with breakouts to
+    saturate the Groq-bound entry path.
+    """
+    rng = random.Random(seed)
+    stage = {t: rng.randrange(len(LIFECYCLE)) for t in tickers}
+    schedule = []
+    expected = Counter()
+    t = 0.0
+    for _ in range(bars):
+        burst = list(tickers)
+        rng.shuffle(burst)
+        for ticker in burst:
+            kind = LIFECYCLE[stage[ticker]]
+            if kind in ('be', 'tp1', 'tp2') and rng.random() < 0.05:
+                kind = 'trend_change'
+            elif kind not in ('be', 'tp1', 'tp2', 'exit') and rng.random() < entry_flood:
+                kind = 'breakout'
+            payload = make_payload(ticker, kind, rng)
+            schedule.append((t, payload, False))
+            expected[(ticker, kind)] += 1
+            if rng.random() < retry_rate:
+                schedule.append((t + rng.uniform(0.05, 0.5), payload, True))
+            t += 1.0 / rate
+            stage[ticker] = (stage[ticker] + 1) % len(LIFECYCLE)
+        t += bar_gap
+    schedule.sort(key=lambda item: item[0])
+    return schedule, expected
+
+def classify_post(text):
+    asset = re.search(r'Asset: (\S+)', text)
+    header = text.splitlines()[0] if text else ''
+    for prefix, kind in HEADER_KINDS:
+        if header.startswith(prefix) or (prefix in ('TP1', 'TP2', 'TP3', 'SL') and prefix in header):
+            return (asset.group(1) if asset else None), kind
+    return (asset.group(1) if asset else None), 'other'
+
+
+# --- DRIVER ---
+_local = threading.local()
+
+def _session():
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def drive(base_url, schedule, concurrency, timeout):
+    results = []
+    lock = threading.Lock()
+    start = time.perf_counter() + 0.2
+
+    def fire(scheduled_at, payload):
+        try:
+            status = _session().post(f'{base_url}/webhook', json=payload, timeout=timeout).status_code
+        except requests.RequestException:
+            status = None
+        # measured from the scheduled send time so a backed-up client doesn't hide queueing
+        latency = time.perf_counter() - scheduled_at
+        with lock:
+            results.append((status, latency, alert_priority(payload)))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for offset, payload, _ in schedule:
+            scheduled_at = start + offset
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, scheduled_at, payload)
+    return results, time.perf_counter() - start
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(label, results, elapsed, telegram, groq, expected):
+    latencies = [lat * 1000 for status, lat, _ in results if status is not None]
+    statuses = Counter(status for status, _, _ in results)
+    posted = Counter(classify_post(p.get('text', '')) for p in telegram.posts)
+    duplicates = sum(max(0, count - expected.get(key, 0)) for key, count in posted.items() if key[1] != 'other')
+    row = {
+        'config': label,
+        'sent': len(results),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        '5xx': sum(n for s, n in statuses.items() if s is not None and s >= 500),
+        'conn_err': statuses.get(None, 0),
+        'posts': len(telegram.posts),
+        'edits': len(telegram.edits),
+        'dupes': duplicates,
+        'groq': sum(n for (name, _), n in groq.calls.items() if name == 'completions'),
+    }
+    for cls, name in enumerate(PRIORITY_CLASSES):
+        class_latencies = [lat * 1000 for status, lat, c in results if c == cls and status is not None and status < 500]
+        row[f'{name}_p99'] = percentile(class_latencies, 99)
+        row[f'{name}_shed'] = sum(1 for status, _, c in results if c == cls and status == 503)
+    return row
+
+def print_report(rows):
+    tables = [
+        ['config', 'sent', 'throughput', 'p50', 'p95', 'p99', '5xx', 'conn_err', 'posts', 'edits', 'dupes', 'groq'],
+        ['config'] + [f'{name}_{m}' for name in PRIORITY_CLASSES for m in ('p99', 'shed')],
+    ]
+    for cols in tables:
+        width = max(10, max(len(c) for c in cols))
+        print()
+        print('  '.join(f'{c:>{width}}' for c in cols))
+        for row in rows:
+            cells = []
+            for c in cols:
+                v = row[c]
+                cells.append(f'{v:>{width}.1f}' if isinstance(v, float) else f'{v:>{width}}')
+            print('  '.join(cells))
+    print('\nper-class p99 covers admitted (non-5xx) requests; shed counts 503s')
+    print('latency in ms (from scheduled send time), throughput in completed req/s')
+
+
+# --- APP UNDER TEST ---
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def app_env(stubs, extra_env=None):
+    """Environment that points main.py at the stubs."""
+    env = dict(os.environ)
+    env.update({
+        'TELEGRAM_TOKEN': '123456:STUB',
+        'TELEGRAM_CHAT_ID': '-1001',
+        'GROQ_API_KEY': 'stub',
+        'TELEGRAM_API_URL': stubs['telegram'].url + '/bot{0}/{1}',
+        'GROQ_BASE_URL': stubs['groq'].url,
+        'INVESTING_CALENDAR_URL': stubs['investing'].url + '/economic-calendar/',
+        'FOREXFACTORY_CALENDAR_URL': stubs['forexfactory'].url + '/calendar?week=this',
+        'WARMUP_ON_START': '0',
+    })
+    env.update(extra_env or {})
+    return env
+
+def start_app(workers, threads, stubs, extra_env):
+    port = free_port()
+    env = app_env(stubs, extra_env)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '--threads', str(threads),
+         '-b', f'127.0.0.1:{port}', '--timeout', '120', '--log-level', 'warning', 'main:app'],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with {proc.returncode}')
+        try:
+            if requests.get(f'{base_url}/health', timeout=1).status_code == 200:
+                return proc, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('app did not become healthy within 30s')
+
+def parse_configs(text):
+    configs = []
+    for item in text.split(','):
+        workers, threads = item.lower().split('x')
+        configs.append((int(workers), int(threads)))
+    return configs
+
+def parse_env(items):
+    return dict(item.split('=', 1) for item in items or [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test /webhook against local stub backends.')
+    parser.add_argument('--tickers', type=int, default=30)
+    parser.add_argument('--bars', type=int, default=8, help='number of bar-close bursts')
+    parser.add_argument('--rate', type=float, default=200.0, help='target requests/s within a burst')
+    parser.add_argument('--bar-gap', type=float, default=1.0, help='seconds between bursts')
+    parser.add_argument('--retry-rate', type=float, default=0.05, help='fraction of alerts re-sent (TradingView retries)')
+    parser.add_argument('--entry-flood', type=float, default=0.0, help='share of pre-trade alerts replaced by breakouts')
+    parser.add_argument('--configs', default='1x1,1x8,4x4', help='comma list of WORKERSxTHREADS')
+    parser.add_argument('--target', help='drive an already-running app instead of starting gunicorn')
+    parser.add_argument('--concurrency', type=int, default=256, help='client-side in-flight limit')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--env', action='append', help='extra KEY=VALUE for the app under test')
+    parser.add_argument('--seed', type=int, default=1)
+    for name, latency in (('tg', 80), ('groq', 600), ('calendar', 400)):
+        parser.add_argument(f'--{name}-latency', type=float, default=latency, help='ms')
+        parser.add_argument(f'--{name}-error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stubs = {
+        'telegram': TelegramStub(latency_ms=args.tg_latency, error_rate=args.tg_error_rate),
+        'groq': GroqStub(latency_ms=args.groq_latency, error_rate=args.groq_error_rate),
+        'investing': CalendarStub('investing', INVESTING_HTML, latency_ms=args.calendar_latency, error_rate=args.calendar_error_rate),
+        'forexfactory': CalendarStub('forexfactory', FOREXFACTORY_HTML, latency_ms=args.calendar_latency, error_rate=args.calendar_error_rate),
+    }
+    for name, stub in stubs.items():
+        print(f'stub {name:<13} {stub.url}  latency={stub.latency_ms:g}ms errors={stub.error_rate:.0%}')
+
+    schedule, expected = build_schedule(make_tickers(args.tickers), args.bars, args.rate, args.bar_gap, args.retry_rate, args.seed, args.entry_flood)
+    print(f'schedule: {len(schedule)} requests, {args.tickers} tickers x {args.bars} bars at {args.rate:.0f} req/s')
+
+    targets = [('external', None)] if args.target else [(f'{w}x{t}', (w, t)) for w, t in parse_configs(args.configs)]
+    rows = []
+    for label, config in targets:
+        for stub in stubs.values():
+            stub.reset()
+        proc = None
+        if config:
+            proc, base_url = start_app(config[0], config[1], stubs, parse_env(args.env))
+        else:
+            base_url = args.target.rstrip('/')
+        try:
+            print(f'running {label} ...')
+            results, elapsed = drive(base_url, schedule, args.concurrency, args.timeout)
+            # let any deferred sends (digests, debounced edits) reach the stub
+            time.sleep(0.5)
+        finally:
+            if proc:
+                proc.terminate()
+                proc.wait(timeout=10)
+        rows.append(summarize(label, results, elapsed, stubs['telegram'], stubs['groq'], expected))
+
+    print_report(rows)
+    for stub in stubs.values():
+        stub.close()
+
+
+if __name__ == '__main__':
+    main()
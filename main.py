@@ -1,20 +1,66 @@
 import os
-from flask import Flask, request, jsonify
-import telebot
-from groq import Groq
+from flask import Flask, request, jsonify, g
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
+import threading
+import queue
 import time
 import json
+import re
+import uuid
+from types import SimpleNamespace
+
+from priority import PRIORITY_CLASSES, alert_priority
 
 # --- CONFIG ---
-bot = telebot.TeleBot(os.environ.get('TELEGRAM_TOKEN'))
 CHANNEL_ID = os.environ.get('TELEGRAM_CHAT_ID')
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL')
+INVESTING_CALENDAR_URL = os.environ.get('INVESTING_CALENDAR_URL', "https://www.investing.com/economic-calendar/")
+FOREXFACTORY_CALENDAR_URL = os.environ.get('FOREXFACTORY_CALENDAR_URL', "https://www.forexfactory.com/calendar?week=this")
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', '0') == '1'
+DIGEST_INTERVAL_SECONDS = float(os.environ.get('DIGEST_INTERVAL_SECONDS', '0'))
+DIGEST_MAX_PENDING = int(os.environ.get('DIGEST_MAX_PENDING', '500'))
+STATUS_DEBOUNCE_SECONDS = float(os.environ.get('STATUS_DEBOUNCE_SECONDS', '0'))
+ADAPTIVE_PROBABILITIES = os.environ.get('ADAPTIVE_PROBABILITIES', '0') == '1'
+STATS_MIN_TRADES = int(os.environ.get('STATS_MIN_TRADES', '20'))
+STATS_PRIOR_TRADES = int(os.environ.get('STATS_PRIOR_TRADES', '20'))
+DESTINATIONS = os.environ.get('DESTINATIONS', '')
+ADMISSION_CAPACITY = int(os.environ.get('ADMISSION_CAPACITY', '0'))
+ADMISSION_LIMITS = os.environ.get('ADMISSION_LIMITS', '')
+ADMISSION_MAX_WAITING = int(os.environ.get('ADMISSION_MAX_WAITING', '16'))
+ADMISSION_WAIT_SECONDS = float(os.environ.get('ADMISSION_WAIT_SECONDS', '20'))
 
 app = Flask(__name__)
 
+# --- LAZY CLIENTS ---
+# telebot, groq and bs4 are imported on first use so a cold worker can answer
+# its first request without paying for them up front.
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_bot():
+    bot = _clients.get('bot')
+    if bot is None:
+        with _clients_lock:
+            bot = _clients.get('bot')
+            if bot is None:
+                import telebot
+                if TELEGRAM_API_URL:
+                    telebot.apihelper.API_URL = TELEGRAM_API_URL
+                bot = telebot.TeleBot(os.environ.get('TELEGRAM_TOKEN'))
+                _clients['bot'] = bot
+    return bot
+
+def get_groq_client():
+    client = _clients.get('groq')
+    if client is None:
+        with _clients_lock:
+            client = _clients.get('groq')
+            if client is None:
+                from groq import Groq
+                client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+                _clients['groq'] = client
+    return client
+
 # --- TRADE TRACKING WITH FULL STATE ---
 active_trades = {}
 cluster_states = {}
@@ -46,6 +92,796 @@ class NewsCache:
 news_cache = NewsCache(ttl_minutes=60)
 mtf_cache = NewsCache(ttl_minutes=15)
 
+# --- FAN-OUT ---
+# DESTINATIONS (a JSON list, or @path to a JSON file) adds extra Telegram chats
+# and webhook sinks, e.g.
+#   [{"name": "vip", "type": "telegram", "chat_id": "-100123", "tickers": ["EURUSD"]},
+#    {"name": "sink", "type": "webhook", "url": "https://example.com/hook", "strategies": ["Ribbon Breakout"]}]
+# Each destination has its own queue, worker thread, rate budget, retry policy
+# and circuit breaker, so a slow or dead one never holds up the request or
+# the other destinations. With fan-out on, CHANNEL_ID is delivered the same way
+# as the "primary" destination (an entry named "primary" overrides its limits):
+# send_alert returns a local alert id at once, and each destination maps alert
+# ids to its own message ids to thread replies and apply edits.
+def load_destinations(value):
+    if not value:
+        return []
+    if value.startswith('@'):
+        with open(value[1:]) as f:
+            return json.load(f)
+    return json.loads(value)
+
+class DestinationError(Exception):
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+def destination_setting(config, key, default, minimum, kind=float):
+    try:
+        value = kind(config.get(key, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"destination {config.get('name')!r}: {key} must be a number, got {config.get(key)!r}")
+    if value < minimum:
+        raise ValueError(f"destination {config.get('name')!r}: {key} must be >= {minimum}, got {value}")
+    return value
+
+class Destination:
+    def __init__(self, config):
+        self.name = config.get('name') or config.get('chat_id') or config.get('url')
+        self.kind = config.get('type', 'telegram')
+        self.chat_id = config.get('chat_id')
+        self.url = config.get('url')
+        self.token = config.get('token')
+        if self.token is not None and not re.fullmatch(r'\d+:[\w-]+', str(self.token)):
+            raise ValueError(f"destination {self.name!r}: token must look like '<bot id>:<secret>'")
+        if self.kind not in ('telegram', 'webhook'):
+            raise ValueError(f"destination {self.name!r}: unknown type {self.kind!r}")
+        if not (self.chat_id if self.kind == 'telegram' else self.url):
+            raise ValueError(f"destination {self.name!r}: {'chat_id' if self.kind == 'telegram' else 'url'} is required")
+        self.tickers = set(config.get('tickers') or [])
+        self.strategies = set(config.get('strategies') or [])
+        default_rate = 20 if self.kind == 'telegram' else 600
+        self.rate = destination_setting(config, 'rate_per_minute', default_rate, 0.01) / 60
+        self.burst = destination_setting(config, 'burst', 5, 1)
+        self.max_retries = destination_setting(config, 'max_retries', 3, 0, int)
+        self.retry_backoff = destination_setting(config, 'retry_backoff', 1.0, 0)
+        self.timeout = destination_setting(config, 'timeout', 10, 0.1)
+        self.failure_threshold = destination_setting(config, 'failure_threshold', 5, 1, int)
+        self.cooldown = destination_setting(config, 'cooldown_seconds', 60, 0)
+        # maxsize 0 would make the queue unbounded
+        self.queue = queue.Queue(maxsize=destination_setting(config, 'queue_size', 200, 1, int))
+        self.tokens = float(self.burst)
+        self.refilled = time.time()
+        self.consecutive_failures = 0
+        self.open_until = 0
+        self.msg_ids = {}
+        self.bot = None
+        # stats, latencies and msg_ids are shared by the worker and request threads
+        self.lock = threading.Lock()
+        self.stats = {'enqueued': 0, 'delivered': 0, 'failed': 0, 'dropped': 0, 'retries': 0, 'skipped': 0}
+        self.latencies = []
+    
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+    
+    def accepts(self, job):
+        # a multi-ticker job must not leak pairs outside the filter
+        if self.tickers and not job['tickers'] <= self.tickers:
+            return False
+        if self.strategies and job['strategy'] not in self.strategies:
+            return False
+        return True
+    
+    def offer(self, job):
+        if time.time() < self.open_until:
+            self._count('dropped')
+            return
+        try:
+            self.queue.put_nowait(job)
+            self._count('enqueued')
+        except queue.Full:
+            self._count('dropped')
+    
+    def _take_token(self):
+        while True:
+            now = time.time()
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+            self.refilled = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+    
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if time.time() < self.open_until:
+                self._count('dropped')
+                continue
+            self._take_token()
+            
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.deliver(job)
+                    self.consecutive_failures = 0
+                    with self.lock:
+                        self.stats['delivered'] += 1
+                        self.latencies.append(time.time() - job['created'])
+                        if len(self.latencies) > 1000:
+                            self.latencies = self.latencies[-500:]
+                    break
+                except DestinationError as e:
+                    if not e.retryable or attempt == self.max_retries:
+                        self._failed(job, e)
+                        break
+                    self._count('retries')
+                    time.sleep(e.retry_after or self.retry_backoff * 2 ** attempt)
+                except Exception as e:
+                    # anything unexpected fails this job; the worker must keep running
+                    self._failed(job, e)
+                    break
+    
+    def _failed(self, job, error):
+        self._count('failed')
+        self.consecutive_failures += 1
+        print(f"FAN-OUT ERROR [{self.name}]: {str(error)}")
+        if self.consecutive_failures >= self.failure_threshold:
+            self.open_until = time.time() + self.cooldown
+            self.consecutive_failures = 0
+            print(f"FAN-OUT [{self.name}]: circuit open for {self.cooldown}s")
+    
+    def deliver(self, job):
+        if self.kind == 'webhook':
+            import requests
+            try:
+                response = requests.post(self.url, data=job['body'], headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+            except requests.RequestException as e:
+                raise DestinationError(str(e))
+            if response.status_code >= 400:
+                raise DestinationError(f"HTTP {response.status_code}", retryable=response.status_code >= 500 or response.status_code == 429)
+            return
+        
+        try:
+            from telebot.apihelper import ApiTelegramException
+            if self.bot is None:
+                if self.token:
+                    import telebot
+                    self.bot = telebot.TeleBot(self.token)
+                else:
+                    self.bot = get_bot()
+        except Exception as e:
+            # a missing or bad token won't fix itself on retry
+            raise DestinationError(f"cannot create Telegram client: {str(e)}", retryable=False)
+        
+        try:
+            if job['kind'] == 'edit':
+                with self.lock:
+                    message_id = self.msg_ids.get(job['alert_id'])
+                if message_id is None:
+                    self._count('skipped')
+                    return
+                self.bot.edit_message_text(job['text'], self.chat_id, message_id)
+            else:
+                with self.lock:
+                    reply_to = self.msg_ids.get(job['reply_to'])
+                sent_msg = self.bot.send_message(self.chat_id, job['text'], reply_to_message_id=reply_to)
+                with self.lock:
+                    self.msg_ids[job['alert_id']] = sent_msg.message_id
+                    if len(self.msg_ids) > 2000:
+                        del self.msg_ids[next(iter(self.msg_ids))]
+        except ApiTelegramException as e:
+            retry_after = (e.result_json or {}).get('parameters', {}).get('retry_after')
+            raise DestinationError(e.description, retryable=e.error_code == 429 or e.error_code >= 500, retry_after=retry_after)
+        except Exception as e:
+            raise DestinationError(str(e))
+    
+    def get_stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stats = dict(self.stats)
+        return dict(
+            type=self.kind,
+            queued=self.queue.qsize(),
+            circuit_open=time.time() < self.open_until,
+            p50_ms=round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            p99_ms=round(latencies[int(len(latencies) * 0.99)] * 1000, 1) if latencies else None,
+            **stats
+        )
+
+PRIMARY_DESTINATION = {'name': 'primary', 'type': 'telegram', 'rate_per_minute': 600, 'burst': 20, 'queue_size': 1000}
+
+class FanOut:
+    def __init__(self, configs, primary_chat_id=None):
+        configs = list(configs)
+        if configs:
+            primary = dict(PRIMARY_DESTINATION, chat_id=primary_chat_id)
+            for config in configs:
+                if config.get('name') == 'primary':
+                    primary.update(config)
+            configs = [primary] + [c for c in configs if c.get('name') != 'primary']
+        self.destinations = [Destination(c) for c in configs]
+        self.started = False
+        self.lock = threading.Lock()
+    
+    def enabled(self):
+        return bool(self.destinations)
+    
+    def _start(self):
+        with self.lock:
+            if self.started:
+                return
+            for dest in self.destinations:
+                threading.Thread(target=dest.run, name=f"fanout-{dest.name}", daemon=True).start()
+            self.started = True
+    
+    def publish(self, kind, text, tickers, strategy, alert_id, reply_to=None, render=None):
+        """render(tickers) re-renders a multi-ticker alert (the digest) for a
+        subset, so ticker-filtered destinations get only their pairs."""
+        if not self.destinations:
+            return
+        if not self.started:
+            self._start()
+        
+        # rendered once per ticker set; destinations with the same filter
+        # share one job
+        job = self._job(kind, text, set(tickers), strategy, alert_id, reply_to)
+        variants = {}
+        for dest in self.destinations:
+            target = job
+            if dest.tickers and not job['tickers'] <= dest.tickers and render is not None:
+                subset = frozenset(job['tickers'] & dest.tickers)
+                if not subset:
+                    continue
+                if subset not in variants:
+                    variants[subset] = self._job(kind, render(subset), set(subset), strategy, alert_id, reply_to)
+                target = variants[subset]
+            if dest.accepts(target):
+                dest.offer(target)
+    
+    def _job(self, kind, text, tickers, strategy, alert_id, reply_to):
+        job = {
+            'kind': kind,
+            'text': text,
+            'tickers': tickers,
+            'strategy': strategy,
+            'alert_id': alert_id,
+            'reply_to': reply_to,
+            'created': time.time()
+        }
+        job['body'] = json.dumps({
+            'event': kind,
+            'tickers': sorted(job['tickers']),
+            'strategy': strategy,
+            'text': text,
+            'alert_id': alert_id,
+            'reply_to_alert_id': reply_to
+        }).encode()
+        return job
+    
+    def export_ids(self, alert_ids):
+        # per-destination message ids, so threading survives a state handoff
+        exported = {}
+        for dest in self.destinations:
+            with dest.lock:
+                exported[dest.name] = {i: dest.msg_ids[i] for i in alert_ids if i in dest.msg_ids}
+        return exported
+    
+    def import_ids(self, ids):
+        for dest in self.destinations:
+            with dest.lock:
+                dest.msg_ids.update(ids.get(dest.name, {}))
+    
+    def get_stats(self):
+        return {
+            'enabled': self.enabled(),
+            'destinations': {d.name: d.get_stats() for d in self.destinations}
+        }
+
+fanout = FanOut(load_destinations(DESTINATIONS), primary_chat_id=CHANNEL_ID)
+
+def send_alert(msg, tickers, strat=None, reply_to_message_id=None, render=None):
+    tickers = [tickers] if isinstance(tickers, str) else tickers
+    if fanout.enabled():
+        alert_id = uuid.uuid4().hex
+        fanout.publish('send', msg, tickers, strat, alert_id, reply_to_message_id, render=render)
+        return SimpleNamespace(message_id=alert_id)
+    return get_bot().send_message(CHANNEL_ID, msg, reply_to_message_id=reply_to_message_id)
+
+def edit_alert(msg, message_id, tickers, strat=None):
+    if fanout.enabled():
+        fanout.publish('edit', msg, [tickers] if isinstance(tickers, str) else tickers, strat, message_id)
+        return
+    get_bot().edit_message_text(msg, CHANNEL_ID, message_id)
+
+def alert_strategy(data, ticker):
+    if data.get('strat'):
+        return data['strat']
+    if ticker in active_trades:
+        return active_trades[ticker].get('strat')
+    if data.get('alert_type') in ("cluster_formed", "confirmed", "breakout_due", "breakout", "trend_change"):
+        return 'Ribbon Breakout'
+    return None
+
+# --- DIGEST MODE ---
+# cluster_formed / confirmed / breakout_due are informational: when
+# DIGEST_INTERVAL_SECONDS > 0 they are buffered and posted as one summary per
+# interval. Tickers in the digest thread later replies off the digest message.
+# A digest over Telegram's length limit goes out as several messages; at most
+# DIGEST_MAX_PENDING alerts are buffered while Telegram is unavailable.
+TELEGRAM_MAX_MESSAGE = 4096
+
+def telegram_length(text):
+    # Telegram counts message length in UTF-16 code units
+    return len(text.encode('utf-16-le')) // 2
+
+def is_retryable_send_error(e):
+    code = getattr(e, 'error_code', None)
+    if code is not None:
+        return code == 429 or code >= 500
+    # requests' connection errors and timeouts are OSErrors
+    return isinstance(e, OSError)
+
+class DigestScheduler:
+    def __init__(self, interval_seconds=0, max_pending=500):
+        self.interval = interval_seconds
+        self.max_pending = max_pending
+        self.pending = []
+        self.lock = threading.Lock()
+        # tickers taken from pending by a flush whose send hasn't settled yet
+        self.in_flight = {}
+        self.settled = threading.Condition(self.lock)
+        self.timer = None
+        self.sent = 0
+        self.alerts_sent = 0
+        self.dropped = 0
+    
+    def enabled(self):
+        return self.interval > 0
+    
+    def _schedule(self):
+        # caller holds self.lock; oldest alerts go first when over the cap
+        overflow = len(self.pending) - self.max_pending
+        if overflow > 0:
+            print(f"DIGEST FULL: dropping {overflow} oldest alerts")
+            self.pending = self.pending[overflow:]
+            self.dropped += overflow
+        if self.pending and self.timer is None:
+            self.timer = threading.Timer(self.interval, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+    
+    def add(self, ticker, line):
+        with self.lock:
+            self.pending.append((ticker, line))
+            self._schedule()
+    
+    def wait_for_ticker(self, ticker, timeout=30):
+        """Blocks until no digest line for the ticker is pending or mid-send,
+        flushing now if one is pending."""
+        with self.lock:
+            pending = any(t == ticker for t, _ in self.pending)
+        if pending:
+            self.flush()
+        with self.lock:
+            self.settled.wait_for(lambda: ticker not in self.in_flight, timeout)
+    
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            entries, self.pending = self.pending, []
+            flushing = {t for t, _ in entries}
+            for ticker in flushing:
+                self.in_flight[ticker] = self.in_flight.get(ticker, 0) + 1
+        
+        try:
+            return self._send(entries)
+        finally:
+            with self.lock:
+                for ticker in flushing:
+                    self.in_flight[ticker] -= 1
+                    if not self.in_flight[ticker]:
+                        del self.in_flight[ticker]
+                self.settled.notify_all()
+    
+    def _send(self, entries):
+        sent = []
+        chunks = self.render(entries)
+        for index, (text, chunk) in enumerate(chunks):
+            tickers = sorted({t for t, _ in chunk})
+            try:
+                sent_msg = send_alert(text, tickers, 'Ribbon Breakout',
+                                      render=lambda subset, chunk=chunk: self.format([e for e in chunk if e[0] in subset]))
+            except Exception as e:
+                if not is_retryable_send_error(e):
+                    # a rejected message won't be accepted on retry either
+                    print(f"DIGEST ERROR: {str(e)}, dropping {len(chunk)} alerts")
+                    with self.lock:
+                        self.dropped += len(chunk)
+                    continue
+                unsent = [entry for _, rest in chunks[index:] for entry in rest]
+                print(f"DIGEST ERROR: {str(e)}, requeueing {len(unsent)} alerts")
+                with self.lock:
+                    self.pending = unsent + self.pending
+                    self._schedule()
+                break
+            
+            for ticker in tickers:
+                if ticker in cluster_states and cluster_states[ticker]['msg_id'] is None:
+                    cluster_states[ticker]['msg_id'] = sent_msg.message_id
+            
+            self.sent += 1
+            self.alerts_sent += len(chunk)
+            sent.append(sent_msg)
+            print(f"Digest sent! ID: {sent_msg.message_id} ({len(chunk)} alerts)")
+        return sent
+    
+    def render(self, entries):
+        """Returns [(text, entries)], one per message. Each ticker's lines stay
+        together (unless they alone overflow a message) so a ticker threads
+        under the single message that lists it."""
+        by_ticker = {}
+        for ticker, line in entries:
+            by_ticker.setdefault(ticker, []).append((ticker, line))
+        
+        budget = TELEGRAM_MAX_MESSAGE - 200  # header, rules and footer
+        chunks, size = [[]], 0
+        for ticker in sorted(by_ticker):
+            group = by_ticker[ticker]
+            if chunks[-1] and size + sum(telegram_length(line) + 1 for _, line in group) > budget:
+                chunks.append([])
+                size = 0
+            for entry in group:
+                length = telegram_length(entry[1]) + 1
+                if chunks[-1] and size + length > budget:
+                    chunks.append([])
+                    size = 0
+                chunks[-1].append(entry)
+                size += length
+        
+        chunks = [c for c in chunks if c]
+        return [
+            (self.format(chunk, f" [{index + 1}/{len(chunks)}]" if len(chunks) > 1 else ""), chunk)
+            for index, chunk in enumerate(chunks)
+        ]
+    
+    def format(self, chunk, part=""):
+        return (
+            f"📋 PRE-TRADE DIGEST ({len(chunk)} alerts, {len({t for t, _ in chunk})} pairs){part}\n"
+            f"{'='*35}\n"
+            + "\n".join(line for _, line in chunk) + "\n"
+            f"{'='*35}\n"
+            f"Time: {datetime.now().strftime('%H:%M UTC')}"
+        )
+    
+    def get_stats(self):
+        with self.lock:
+            pending = len(self.pending)
+        return {
+            'enabled': self.enabled(),
+            'interval_seconds': self.interval,
+            'pending': pending,
+            'max_pending': self.max_pending,
+            'digests_sent': self.sent,
+            'alerts_sent': self.alerts_sent,
+            'dropped': self.dropped
+        }
+
+digest = DigestScheduler(interval_seconds=DIGEST_INTERVAL_SECONDS, max_pending=DIGEST_MAX_PENDING)
+
+def cluster_msg_id(ticker):
+    # A trade-critical reply can't wait for the digest timer: flush now (or wait
+    # for a flush already sending it) so the ticker has a message to thread under.
+    if ticker in cluster_states and cluster_states[ticker]['msg_id'] is None and digest.enabled():
+        digest.wait_for_ticker(ticker)
+    return cluster_states[ticker]['msg_id'] if ticker in cluster_states else None
+
+# --- LIVE TRADE STATUS ---
+# When STATUS_DEBOUNCE_SECONDS > 0 each trade keeps one status message that
+# BE/TP1/TP2 edit in place. Updates landing inside the debounce window are
+# coalesced into a single edit; only TP3/SL post a fresh reply.
+def trade_status_line(trade):
+    be_status = "DONE" if trade['be_hit'] else "PENDING"
+    tp1_status = "DONE" if trade['tp1_hit'] else "PENDING"
+    tp2_status = "DONE" if trade['tp2_hit'] else "PENDING"
+    tp3_status = "DONE" if trade['tp3_hit'] else "PENDING"
+    return f"BE {be_status} | TP1 {tp1_status} | TP2 {tp2_status} | TP3 {tp3_status}"
+
+def render_trade_status(trade, event, price, result, ai_suggestion):
+    header = "🏁 TRADE CLOSED" if trade['closed'] else "📍 LIVE TRADE STATUS"
+    return (
+        f"{header}\n"
+        f"{'='*35}\n"
+        f"Asset: {trade['ticker']} | {trade['direction']}\n"
+        f"Entry: {trade['entry']} | SL: {trade['sl']}\n"
+        f"Status: {trade_status_line(trade)}\n"
+        f"{'-'*35}\n"
+        f"Last: {event} @ {price}\n"
+        f"Result: {result}\n"
+        f"AI: {ai_suggestion}\n"
+        f"{'='*35}\n"
+        f"Updated: {datetime.now().strftime('%H:%M:%S UTC')}"
+    )
+
+class TradeStatusBoard:
+    def __init__(self, debounce_seconds=0):
+        self.debounce = debounce_seconds
+        self.lock = threading.Lock()
+        self.ticker_locks = {}
+        self.timers = {}
+        self.pending = {}
+        # status messages already rendered as closed; bounded, oldest first
+        self.closed = {}
+        self.sent = 0
+        self.edits = 0
+        self.coalesced = 0
+    
+    def enabled(self):
+        return self.debounce > 0
+    
+    def _ticker_lock(self, ticker):
+        with self.lock:
+            return self.ticker_locks.setdefault(ticker, threading.Lock())
+    
+    def update(self, ticker, text):
+        trade = active_trades[ticker]
+        with self._ticker_lock(ticker):
+            if trade.get('status_msg_id') is None:
+                sent_msg = send_alert(text, ticker, trade.get('strat'), reply_to_message_id=trade['msg_id'])
+                trade['status_msg_id'] = sent_msg.message_id
+                self.sent += 1
+                return 'sent'
+        
+        with self.lock:
+            if ticker in self.timers:
+                self.coalesced += 1
+            else:
+                timer = threading.Timer(self.debounce, self._fire, args=(ticker,))
+                timer.daemon = True
+                self.timers[ticker] = timer
+                timer.start()
+            self.pending[ticker] = (trade['status_msg_id'], text, ticker, trade.get('strat'))
+        return 'queued'
+    
+    def finish(self, ticker, text):
+        with self.lock:
+            timer = self.timers.pop(ticker, None)
+            if timer is not None:
+                timer.cancel()
+                self.coalesced += 1
+            self.pending.pop(ticker, None)
+        
+        trade = active_trades[ticker]
+        if trade.get('status_msg_id') is not None:
+            self._edit(trade['status_msg_id'], text, ticker, trade.get('strat'), final=True)
+        with self.lock:
+            self.ticker_locks.pop(ticker, None)
+    
+    def _fire(self, ticker):
+        with self.lock:
+            self.timers.pop(ticker, None)
+            item = self.pending.pop(ticker, None)
+        if item:
+            self._edit(*item)
+    
+    def _edit(self, msg_id, text, ticker, strat, final=False):
+        # A debounced edit that was already in flight when the trade closed
+        # must neither interleave with nor land after the closing edit.
+        with self._ticker_lock(ticker):
+            if msg_id in self.closed:
+                print(f"STATUS EDIT SKIPPED for message {msg_id}: trade already closed")
+                return
+            try:
+                edit_alert(text, msg_id, ticker, strat)
+                self.edits += 1
+            except Exception as e:
+                print(f"STATUS EDIT ERROR for message {msg_id}: {str(e)}")
+            finally:
+                if final:
+                    with self.lock:
+                        self.closed[msg_id] = True
+                        if len(self.closed) > 1000:
+                            del self.closed[next(iter(self.closed))]
+    
+    def get_stats(self):
+        with self.lock:
+            pending = len(self.pending)
+        return {
+            'enabled': self.enabled(),
+            'debounce_seconds': self.debounce,
+            'pending_edits': pending,
+            'status_messages_sent': self.sent,
+            'edits_sent': self.edits,
+            'updates_coalesced': self.coalesced
+        }
+
+status_board = TradeStatusBoard(debounce_seconds=STATUS_DEBOUNCE_SECONDS)
+
+# --- ADMISSION CONTROL ---
+# With ADMISSION_CAPACITY > 0, /webhook requests are admitted in strict class
+# order (exits/BE, trend_change, entries, informational), each class capped by
+# its own in-flight limit. When more than ADMISSION_MAX_WAITING requests are
+# queued the lowest class waiting is shed with a 503. Waiting requests hold a
+# server thread, so run with threads > capacity + max waiting. Classes come
+# from priority.py, which the load-test tooling shares.
+def parse_admission_limits(text, capacity):
+    limits = [capacity, capacity, max(1, capacity // 2), max(1, capacity // 4)]
+    for item in filter(None, text.split(',')):
+        name, value = item.split('=')
+        limits[PRIORITY_CLASSES.index(name.strip())] = int(value)
+    return limits
+
+class AdmissionController:
+    def __init__(self, capacity=0, limits=None, max_waiting=16, wait_seconds=20):
+        self.capacity = capacity
+        self.limits = limits or [capacity] * len(PRIORITY_CLASSES)
+        self.max_waiting = max_waiting
+        self.wait_seconds = wait_seconds
+        self.cond = threading.Condition()
+        self.in_flight = [0] * len(PRIORITY_CLASSES)
+        self.waiting = [[] for _ in PRIORITY_CLASSES]
+        self.admitted = [0] * len(PRIORITY_CLASSES)
+        self.shed = [0] * len(PRIORITY_CLASSES)
+    
+    def enabled(self):
+        return self.capacity > 0
+    
+    def _runnable(self, cls):
+        return self.in_flight[cls] < self.limits[cls] and sum(self.in_flight) < self.capacity
+    
+    def _can_start(self, cls, ticket):
+        if not self._runnable(cls) or self.waiting[cls][0] is not ticket:
+            return False
+        # a higher class that could run right now goes first
+        return not any(self.waiting[h] and self._runnable(h) for h in range(cls))
+    
+    def acquire(self, cls):
+        with self.cond:
+            if sum(len(w) for w in self.waiting) >= self.max_waiting:
+                victim = next((c for c in range(len(PRIORITY_CLASSES) - 1, cls, -1) if self.waiting[c]), None)
+                if victim is None:
+                    self.shed[cls] += 1
+                    return False
+                self.waiting[victim].pop()['shed'] = True
+                self.cond.notify_all()
+            
+            ticket = {'shed': False}
+            self.waiting[cls].append(ticket)
+            deadline = time.time() + self.wait_seconds
+            while True:
+                if ticket['shed']:
+                    self.shed[cls] += 1
+                    return False
+                if self._can_start(cls, ticket):
+                    self.waiting[cls].pop(0)
+                    self.in_flight[cls] += 1
+                    self.admitted[cls] += 1
+                    self.cond.notify_all()
+                    return True
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self.waiting[cls].remove(ticket)
+                    self.shed[cls] += 1
+                    self.cond.notify_all()
+                    return False
+                self.cond.wait(remaining)
+    
+    def release(self, cls):
+        with self.cond:
+            self.in_flight[cls] -= 1
+            self.cond.notify_all()
+    
+    def get_stats(self):
+        with self.cond:
+            return {
+                'enabled': self.enabled(),
+                'capacity': self.capacity,
+                'max_waiting': self.max_waiting,
+                'classes': {name: {
+                    'limit': self.limits[i],
+                    'in_flight': self.in_flight[i],
+                    'waiting': len(self.waiting[i]),
+                    'admitted': self.admitted[i],
+                    'shed': self.shed[i]
+                } for i, name in enumerate(PRIORITY_CLASSES)}
+            }
+
+admission = AdmissionController(
+    capacity=ADMISSION_CAPACITY,
+    limits=parse_admission_limits(ADMISSION_LIMITS, ADMISSION_CAPACITY),
+    max_waiting=ADMISSION_MAX_WAITING,
+    wait_seconds=ADMISSION_WAIT_SECONDS
+)
+
+@app.before_request
+def admit_webhook():
+    if request.path != '/webhook' or not admission.enabled():
+        return None
+    
+    data = request.get_json(silent=True) or {}
+    priority = alert_priority(data)
+    if not admission.acquire(priority):
+        print(f"SHED: {PRIORITY_CLASSES[priority]} alert for {data.get('ticker', 'UNKNOWN')}")
+        return jsonify({'status': 'shed', 'class': PRIORITY_CLASSES[priority]}), 503
+    g.admission_class = priority
+    return None
+
+@app.teardown_request
+def release_webhook(exc):
+    priority = g.pop('admission_class', None)
+    if priority is not None:
+        admission.release(priority)
+
+# --- STRATEGY PERFORMANCE ---
+# Running aggregates updated once per closed trade (Welford for mean/variance
+# of R), kept per strategy x ticker x tf and per strategy overall.
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.mean_r = 0.0
+        self.m2 = 0.0
+    
+    def update(self, r):
+        self.count += 1
+        if r > 0:
+            self.wins += 1
+        delta = r - self.mean_r
+        self.mean_r += delta / self.count
+        self.m2 += delta * (r - self.mean_r)
+    
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'win_rate': round(100 * self.wins / self.count, 1) if self.count else None,
+            'mean_r': round(self.mean_r, 3),
+            'var_r': round(self.m2 / (self.count - 1), 3) if self.count > 1 else None
+        }
+
+class StrategyStats:
+    def __init__(self, min_trades=20, prior_trades=20):
+        self.min_trades = min_trades
+        self.prior_trades = prior_trades
+        self.by_key = {}
+        self.by_strategy = {}
+        self.lock = threading.Lock()
+    
+    def record(self, strat, ticker, tf, r):
+        with self.lock:
+            self.by_key.setdefault((strat, ticker, tf), RunningStats()).update(r)
+            self.by_strategy.setdefault(strat, RunningStats()).update(r)
+    
+    def base_probability(self, strat, ticker, tf, static_prob):
+        # Shrink the observed win rate toward the static table so a handful of
+        # trades can't swing it; prefer the exact key once it has enough history.
+        with self.lock:
+            stats = self.by_key.get((strat, ticker, tf))
+            if stats is None or stats.count < self.min_trades:
+                stats = self.by_strategy.get(strat)
+            if stats is None or stats.count == 0:
+                return static_prob
+            return round((static_prob * self.prior_trades + 100 * stats.wins) / (self.prior_trades + stats.count))
+    
+    def get_stats(self):
+        with self.lock:
+            return {
+                'strategies': {strat: s.to_dict() for strat, s in self.by_strategy.items()},
+                'breakdown': [
+                    dict(strategy=strat, ticker=ticker, tf=tf, **s.to_dict())
+                    for (strat, ticker, tf), s in self.by_key.items()
+                ]
+            }
+    
+    def clear(self):
+        with self.lock:
+            self.by_key = {}
+            self.by_strategy = {}
+
+strategy_stats = StrategyStats(min_trades=STATS_MIN_TRADES, prior_trades=STATS_PRIOR_TRADES)
+
 # --- CPI NEWS SCRAPER ---
 def get_cpi_bias():
     cache_key = 'cpi_news'
@@ -59,9 +895,11 @@ def get_cpi_bias():
 
 def scrape_investing_com():
     try:
-        url = "https://www.investing.com/economic-calendar/"
+        url = INVESTING_CALENDAR_URL
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
         
+        import requests
+        from bs4 import BeautifulSoup
         response = requests.get(url, headers=headers, timeout=8)
         if response.status_code != 200:
             return None
@@ -92,9 +930,11 @@ def scrape_investing_com():
 
 def scrape_forex_factory():
     try:
-        url = "https://www.forexfactory.com/calendar?week=this"
+        url = FOREXFACTORY_CALENDAR_URL
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
         
+        import requests
+        from bs4 import BeautifulSoup
         response = requests.get(url, headers=headers, timeout=8)
         if response.status_code != 200:
             return None
@@ -159,6 +999,8 @@ def get_ai_analysis(data):
     }
     
     base_prob = strategy_probabilities.get(strat, 50)
+    if ADAPTIVE_PROBABILITIES:
+        base_prob = strategy_stats.base_probability(strat, ticker, tf, base_prob)
     cpi_data = get_cpi_bias()
     mtf_data = get_mtf_correlation(ticker, tf)
     
@@ -188,7 +1030,7 @@ Analysis: [One sentence on setup quality and key risk]
 Keep analysis under 120 characters."""
     
     try:
-        completion = client.chat.completions.create(
+        completion = get_groq_client().chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -230,7 +1072,7 @@ Suggestion: [HOLD or CLOSE] - [Brief reason in 10 words or less]
 Example: "Suggestion: HOLD - Strong momentum supports TP2 target" """
     
     try:
-        completion = client.chat.completions.create(
+        completion = get_groq_client().chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -258,6 +1100,32 @@ def calculate_rr(entry, sl, current_price, direction):
     rr = profit / risk
     return round(rr, 1)
 
+# --- WARM-UP ---
+warmup_state = {'started': None, 'finished': None, 'results': {}}
+
+def warm_up():
+    warmup_state['started'] = time.time()
+    results = {}
+    
+    try:
+        get_bot().get_me()
+        results['telegram'] = 'ok'
+    except Exception as e:
+        results['telegram'] = f'error: {e}'
+    
+    try:
+        get_groq_client().models.list()
+        results['groq'] = 'ok'
+    except Exception as e:
+        results['groq'] = f'error: {e}'
+    
+    results['news'] = get_cpi_bias()['source']
+    
+    warmup_state['results'] = results
+    warmup_state['finished'] = time.time()
+    print(f"WARM-UP DONE in {warmup_state['finished'] - warmup_state['started']:.2f}s: {results}")
+    return results
+
 # --- WEBHOOK ---
 @app.route('/webhook', methods=['POST'])
 def webhook():
@@ -272,6 +1140,8 @@ def webhook():
         ticker = data.get('ticker', 'UNKNOWN')
         alert_type = data.get('alert_type', 'signal')
         
+        strat = alert_strategy(data, ticker)
+        
         print(f"Processing alert_type: {alert_type} for {ticker}")
         
         # ===== RIBBON STRATEGY ALERTS =====
@@ -294,20 +1164,26 @@ def webhook():
                 f"Time: {datetime.now().strftime('%H:%M UTC')}"
             )
             
-            print(f"Sending cluster message to Telegram...")
-            sent_msg = bot.send_message(CHANNEL_ID, msg)
-            print(f"Message sent! ID: {sent_msg.message_id}")
-            
             cluster_states[ticker] = {
                 'cluster_formed': True,
                 'confirmed': False,
                 'brokeout': False,
                 'direction': direction,
                 'cluster_price': price,
-                'msg_id': sent_msg.message_id,
+                'msg_id': None,
                 'tf': tf
             }
             
+            if digest.enabled():
+                digest.add(ticker, f"🔵 {ticker} {tf} {direction} cluster @ {price} (spread {spread}%)")
+                return jsonify({'status': 'ok', 'message': 'Cluster alert queued for digest'}), 200
+            
+            print(f"Sending cluster message to Telegram...")
+            sent_msg = send_alert(msg, ticker, strat)
+            print(f"Message sent! ID: {sent_msg.message_id}")
+            
+            cluster_states[ticker]['msg_id'] = sent_msg.message_id
+            
             return jsonify({'status': 'ok', 'message': 'Cluster alert sent'}), 200
         
         elif alert_type == "confirmed":
@@ -315,13 +1191,18 @@ def webhook():
             price = data.get('price', 'N/A')
             tf = data.get('tf', 'N/A')
             
+            if ticker in cluster_states:
+                cluster_states[ticker]['confirmed'] = True
+            
+            if digest.enabled():
+                digest.add(ticker, f"✅ {ticker} {tf} {direction} confirmed @ {price}")
+                return jsonify({'status': 'ok', 'message': 'Confirmation queued for digest'}), 200
+            
             if ticker not in cluster_states:
                 msg = f"✅ CONFIRMED\nAsset: {ticker} | TF: {tf}\nDirection: {direction}\nPrice: {price}"
-                bot.send_message(CHANNEL_ID, msg)
+                send_alert(msg, ticker, strat)
                 return jsonify({'status': 'ok'}), 200
             
-            cluster_states[ticker]['confirmed'] = True
-            
             msg = (
                 f"✅ CONFIRMATION RECEIVED\n"
                 f"{'='*35}\n"
@@ -335,7 +1216,7 @@ def webhook():
                 f"Time: {datetime.now().strftime('%H:%M UTC')}"
             )
             
-            bot.send_message(CHANNEL_ID, msg, reply_to_message_id=cluster_states[ticker]['msg_id'])
+            send_alert(msg, ticker, strat, reply_to_message_id=cluster_states[ticker]['msg_id'])
             
             return jsonify({'status': 'ok', 'message': 'Confirmation sent'}), 200
         
@@ -344,9 +1225,13 @@ def webhook():
             spread = data.get('spread', 'N/A')
             tf = data.get('tf', 'N/A')
             
+            if digest.enabled():
+                digest.add(ticker, f"⚡ {ticker} {tf} {direction} breakout due (spread {spread}%)")
+                return jsonify({'status': 'ok', 'message': 'Breakout due queued for digest'}), 200
+            
             if ticker not in cluster_states:
                 msg = f"⚡ BREAKOUT DUE\nAsset: {ticker} | TF: {tf}\nRibbons spreading!"
-                bot.send_message(CHANNEL_ID, msg)
+                send_alert(msg, ticker, strat)
                 return jsonify({'status': 'ok'}), 200
             
             msg = (
@@ -361,7 +1246,7 @@ def webhook():
                 f"Time: {datetime.now().strftime('%H:%M UTC')}"
             )
             
-            bot.send_message(CHANNEL_ID, msg, reply_to_message_id=cluster_states[ticker]['msg_id'])
+            send_alert(msg, ticker, strat, reply_to_message_id=cluster_states[ticker]['msg_id'])
             
             return jsonify({'status': 'ok', 'message': 'Breakout due sent'}), 200
         
@@ -406,10 +1291,7 @@ def webhook():
                 f"Time: {datetime.now().strftime('%H:%M UTC')}"
             )
             
-            if ticker in cluster_states:
-                sent_msg = bot.send_message(CHANNEL_ID, msg, reply_to_message_id=cluster_states[ticker]['msg_id'])
-            else:
-                sent_msg = bot.send_message(CHANNEL_ID, msg)
+            sent_msg = send_alert(msg, ticker, strat, reply_to_message_id=cluster_msg_id(ticker))
             
             active_trades[ticker] = {
                 'msg_id': sent_msg.message_id,
@@ -419,6 +1301,8 @@ def webhook():
                 'tp1': tp,
                 'tp2': tp,
                 'tp3': tp,
+                'strat': 'Ribbon Breakout',
+                'tf': tf,
                 'be_hit': False,
                 'tp1_hit': False,
                 'tp2_hit': False,
@@ -450,12 +1334,12 @@ def webhook():
                 f"Time: {datetime.now().strftime('%H:%M UTC')}"
             )
             
-            if ticker in cluster_states:
-                bot.send_message(CHANNEL_ID, msg, reply_to_message_id=cluster_states[ticker]['msg_id'])
+            if cluster_msg_id(ticker) is not None:
+                send_alert(msg, ticker, strat, reply_to_message_id=cluster_states[ticker]['msg_id'])
             elif ticker in active_trades:
-                bot.send_message(CHANNEL_ID, msg, reply_to_message_id=active_trades[ticker]['msg_id'])
+                send_alert(msg, ticker, strat, reply_to_message_id=active_trades[ticker]['msg_id'])
             else:
-                bot.send_message(CHANNEL_ID, msg)
+                send_alert(msg, ticker, strat)
             
             return jsonify({'status': 'ok', 'message': 'Trend change sent'}), 200
         
@@ -468,7 +1352,7 @@ def webhook():
                     f"Stop Loss moved to Entry\n"
                     f"Risk eliminated! (0RR secured)"
                 )
-                bot.send_message(CHANNEL_ID, msg)
+                send_alert(msg, ticker, strat)
                 return jsonify({'status': 'ok'}), 200
             
             if active_trades[ticker]['be_hit']:
@@ -477,6 +1361,11 @@ def webhook():
             
             active_trades[ticker]['be_hit'] = True
             
+            if status_board.enabled():
+                trade = active_trades[ticker]
+                status_board.update(ticker, render_trade_status(trade, "BREAK-EVEN SECURED", data.get('price'), "0RR (Secured)", "Risk eliminated"))
+                return jsonify({'status': 'ok', 'message': 'Status updated'}), 200
+            
             status = f"BE DONE | TP1 {'DONE' if active_trades[ticker]['tp1_hit'] else 'PENDING'} | TP2 PENDING | TP3 PENDING"
             
             msg = (
@@ -487,7 +1376,7 @@ def webhook():
                 f"Risk: 0RR (Secured)"
             )
             
-            bot.send_message(CHANNEL_ID, msg, reply_to_message_id=active_trades[ticker]['msg_id'])
+            send_alert(msg, ticker, strat, reply_to_message_id=active_trades[ticker]['msg_id'])
             
             return jsonify({'status': 'ok'}), 200
         
@@ -498,7 +1387,7 @@ def webhook():
             
             if ticker not in active_trades:
                 msg = f"{hit_msg}\nAsset: {ticker}\nPrice: {price}"
-                bot.send_message(CHANNEL_ID, msg)
+                send_alert(msg, ticker, strat)
                 return jsonify({'status': 'ok'}), 200
             
             trade = active_trades[ticker]
@@ -509,9 +1398,22 @@ def webhook():
                 return jsonify({'status': 'duplicate'}), 200
             if "TP3" in hit_msg and trade['tp3_hit']:
                 return jsonify({'status': 'duplicate'}), 200
-            if "SL" in hit_msg and (trade['sl_hit'] or trade['be_hit']):
-                print(f"SL hit after BE for {ticker}, ignoring")
-                return jsonify({'status': 'ignored'}), 200
+            if "SL" in hit_msg and trade['sl_hit']:
+                # already recorded; the trade is still here only if its post failed
+                return jsonify({'status': 'duplicate'}), 200
+            if "SL" in hit_msg and trade['be_hit']:
+                # No post for a stop at entry, but the trade is over: it
+                # closes flat so realized R covers every closed trade.
+                print(f"SL hit after BE for {ticker}, closing at 0R")
+                trade['sl_hit'] = True
+                trade['closed'] = True
+                strategy_stats.record(trade.get('strat', 'Unknown'), ticker, trade.get('tf', 'N/A'), 0.0)
+                if status_board.enabled():
+                    status_board.finish(ticker, render_trade_status(trade, hit_msg, price, "0R (stopped at break-even)", "Closed at entry."))
+                del active_trades[ticker]
+                if ticker in cluster_states:
+                    del cluster_states[ticker]
+                return jsonify({'status': 'ignored', 'message': 'SL after BE, closed at 0R'}), 200
             
             rr = calculate_rr(trade['entry'], trade['sl'], price, trade['direction'])
             
@@ -554,24 +1456,27 @@ def webhook():
                 rr_display = f"{rr}R"
                 ai_suggestion = "Monitor trade progress"
             
-            be_status = "DONE" if trade['be_hit'] else "PENDING"
-            tp1_status = "DONE" if trade['tp1_hit'] else "PENDING"
-            tp2_status = "DONE" if trade['tp2_hit'] else "PENDING"
-            tp3_status = "DONE" if trade['tp3_hit'] else "PENDING"
+            if trade['closed']:
+                strategy_stats.record(trade.get('strat', 'Unknown'), ticker, trade.get('tf', 'N/A'), rr)
+            
+            if status_board.enabled() and not trade['closed']:
+                status_board.update(ticker, render_trade_status(trade, hit_msg, price, rr_display, ai_suggestion))
+                return jsonify({'status': 'ok', 'message': 'Status updated'}), 200
             
-            status_line = f"BE {be_status} | TP1 {tp1_status} | TP2 {tp2_status} | TP3 {tp3_status}"
+            if status_board.enabled():
+                status_board.finish(ticker, render_trade_status(trade, hit_msg, price, rr_display, ai_suggestion))
             
             msg = (
                 f"{hit_msg}\n"
                 f"Asset: {ticker}\n"
-                f"Status: {status_line}\n"
+                f"Status: {trade_status_line(trade)}\n"
                 f"Exit Price: {price}\n"
                 f"Result: {rr_display}\n"
                 f"---\n"
                 f"AI: {ai_suggestion}"
             )
             
-            bot.send_message(CHANNEL_ID, msg, reply_to_message_id=trade['msg_id'])
+            send_alert(msg, ticker, strat, reply_to_message_id=trade['msg_id'])
             
             if trade['closed']:
                 del active_trades[ticker]
@@ -605,7 +1510,7 @@ def webhook():
                 f"Time: {datetime.now().strftime('%H:%M UTC')}"
             )
             
-            sent_msg = bot.send_message(CHANNEL_ID, msg)
+            sent_msg = send_alert(msg, ticker, strat)
             
             active_trades[ticker] = {
                 'msg_id': sent_msg.message_id,
@@ -615,6 +1520,8 @@ def webhook():
                 'tp1': data.get('tp1'),
                 'tp2': data.get('tp2'),
                 'tp3': data.get('tp3'),
+                'strat': data.get('strat'),
+                'tf': data.get('tf', 'N/A'),
                 'be_hit': False,
                 'tp1_hit': False,
                 'tp2_hit': False,
@@ -640,6 +1547,10 @@ def cache_stats():
     return jsonify({
         'news_cache': news_cache.get_stats(),
         'mtf_cache': mtf_cache.get_stats(),
+        'digest': digest.get_stats(),
+        'status_board': status_board.get_stats(),
+        'admission': admission.get_stats(),
+        'fanout': fanout.get_stats(),
         'active_trades': len(active_trades),
         'cluster_states': len(cluster_states),
         'trades': {k: {
@@ -654,18 +1565,85 @@ def cache_stats():
         } for k, v in cluster_states.items()}
     })
 
+@app.route('/destinations', methods=['GET'])
+def destination_stats():
+    return jsonify(fanout.get_stats())
+
 @app.route('/cache/clear', methods=['POST'])
 def clear_cache():
     news_cache.clear()
     mtf_cache.clear()
     return jsonify({'status': 'Cache cleared'})
 
+@app.route('/digest/flush', methods=['POST'])
+def flush_digest():
+    sent = digest.flush()
+    return jsonify({
+        'status': 'Digest flushed' if sent else 'Nothing sent',
+        'message_ids': [m.message_id for m in sent],
+        'pending': digest.get_stats()['pending']
+    })
+
 @app.route('/trades/clear', methods=['POST'])
 def clear_trades():
     active_trades.clear()
     cluster_states.clear()
     return jsonify({'status': 'All trades and clusters cleared'})
 
+@app.route('/stats/strategies', methods=['GET'])
+def strategy_performance():
+    return jsonify(dict(
+        adaptive_probabilities=ADAPTIVE_PROBABILITIES,
+        min_trades=STATS_MIN_TRADES,
+        prior_trades=STATS_PRIOR_TRADES,
+        **strategy_stats.get_stats()
+    ))
+
+@app.route('/stats/clear', methods=['POST'])
+def clear_strategy_stats():
+    strategy_stats.clear()
+    return jsonify({'status': 'Strategy stats cleared'})
+
+@app.route('/warmup', methods=['GET', 'POST'])
+def warmup():
+    results = warm_up()
+    return jsonify({
+        'status': 'warm',
+        'seconds': round(warmup_state['finished'] - warmup_state['started'], 3),
+        'results': results
+    })
+
+# STATE HANDOFF (used by router.py when tickers move between instances)
+@app.route('/state/tickers', methods=['GET'])
+def state_tickers():
+    return jsonify({'tickers': sorted(set(active_trades) | set(cluster_states))})
+
+@app.route('/state/export', methods=['POST'])
+def export_state():
+    tickers = (request.get_json(silent=True) or {}).get('tickers', [])
+    state = {
+        'active_trades': {t: active_trades.pop(t) for t in tickers if t in active_trades},
+        'cluster_states': {t: cluster_states.pop(t) for t in tickers if t in cluster_states}
+    }
+    if fanout.enabled():
+        entries = list(state['active_trades'].values()) + list(state['cluster_states'].values())
+        state['fanout_ids'] = fanout.export_ids({e.get(k) for e in entries for k in ('msg_id', 'status_msg_id')} - {None})
+    print(f"STATE EXPORTED: {len(state['active_trades'])} trades, {len(state['cluster_states'])} clusters")
+    return jsonify(state)
+
+@app.route('/state/import', methods=['POST'])
+def import_state():
+    state = request.get_json(silent=True) or {}
+    active_trades.update(state.get('active_trades', {}))
+    cluster_states.update(state.get('cluster_states', {}))
+    fanout.import_ids(state.get('fanout_ids', {}))
+    print(f"STATE IMPORTED: {len(state.get('active_trades', {}))} trades, {len(state.get('cluster_states', {}))} clusters")
+    return jsonify({
+        'status': 'ok',
+        'active_trades': len(active_trades),
+        'cluster_states': len(cluster_states)
+    })
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -683,7 +1661,7 @@ def home():
         'service': 'AAD-FX Trading Bot',
         'version': '3.0 - Fan Momentum',
         'status': 'running',
-        'endpoints': ['/webhook', '/health', '/cache/stats', '/trades/clear', '/test', '/test/cluster', '/test/breakout']
+        'endpoints': ['/webhook', '/health', '/cache/stats', '/trades/clear', '/digest/flush', '/stats/strategies', '/destinations', '/warmup', '/test', '/test/cluster', '/test/breakout']
     })
 
 @app.route('/test', methods=['GET', 'POST'])
@@ -698,7 +1676,7 @@ def test_notification():
             f"If you see this, webhook integration works!"
         )
         
-        sent = bot.send_message(CHANNEL_ID, test_msg)
+        sent = get_bot().send_message(CHANNEL_ID, test_msg)
         
         return jsonify({
             'status': 'success',
@@ -745,7 +1723,7 @@ def test_cluster():
             f"Time: {datetime.now().strftime('%H:%M UTC')}"
         )
         
-        sent_msg = bot.send_message(CHANNEL_ID, msg)
+        sent_msg = get_bot().send_message(CHANNEL_ID, msg)
         
         return jsonify({
             'status': 'success',
@@ -813,7 +1791,7 @@ def test_breakout():
             f"Time: {datetime.now().strftime('%H:%M UTC')}"
         )
         
-        sent_msg = bot.send_message(CHANNEL_ID, msg)
+        sent_msg = get_bot().send_message(CHANNEL_ID, msg)
         
         return jsonify({
             'status': 'success',
@@ -826,6 +1804,9 @@ def test_breakout():
             'message': str(e)
         }), 500
 
+if WARMUP_ON_START:
+    threading.Thread(target=warm_up, daemon=True).start()
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     print(f"=== AAD-FX Bot v3.0 Starting ===")
@@ -834,5 +1815,11 @@ if __name__ == '__main__':
     print(f"Telegram Token Set: {bool(os.environ.get('TELEGRAM_TOKEN'))}")
     print(f"Channel ID Set: {bool(os.environ.get('TELEGRAM_CHAT_ID'))}")
     print(f"Groq API Set: {bool(os.environ.get('GROQ_API_KEY'))}")
+    print(f"Warm-up On Start: {WARMUP_ON_START}")
+    print(f"Digest Interval: {DIGEST_INTERVAL_SECONDS or 'off'}")
+    print(f"Status Debounce: {STATUS_DEBOUNCE_SECONDS or 'off'}")
+    print(f"Admission Capacity: {ADMISSION_CAPACITY or 'off'}")
+    print(f"Adaptive Probabilities: {ADAPTIVE_PROBABILITIES}")
+    print(f"Fan-out Destinations: {len(fanout.destinations)}")
     print(f"=========================")
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,14 @@
+# Alert priority classes for /webhook admission control. Kept free of app
+# imports so load-test tooling can classify payloads exactly like main.py
+# without importing it.
+PRIORITY_CLASSES = ['exit', 'trend_change', 'entry', 'info']
+
+def alert_priority(data):
+    alert_type = data.get('alert_type', 'signal')
+    if 'hit' in data or data.get('status') == "MOVED TO BE":
+        return 0
+    if alert_type == "trend_change":
+        return 1
+    if alert_type == "breakout" or ('sig' in data and 'strat' in data):
+        return 2
+    return 3
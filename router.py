@@ -0,0 +1,294 @@
+import os
+import bisect
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import requests
+from flask import Flask, request, jsonify, Response
+
+# Front router: consistent-hashes the `ticker` of each /webhook payload to one
+# of several main.py instances so each backend owns its tickers' trade state.
+# Run with one process (threads are fine) since the ring lives in memory:
+#   ROUTER_NODES=http://127.0.0.1:5001,http://127.0.0.1:5002 python router.py
+
+# --- CONFIG ---
+ROUTER_NODES = [n.strip().rstrip('/') for n in os.environ.get('ROUTER_NODES', '').split(',') if n.strip()]
+ROUTER_VNODES = int(os.environ.get('ROUTER_VNODES', '100'))
+ROUTER_TIMEOUT = float(os.environ.get('ROUTER_TIMEOUT', '30'))
+HANDOFF_WAIT_SECONDS = float(os.environ.get('HANDOFF_WAIT_SECONDS', '30'))
+
+app = Flask(__name__)
+
+# --- HASH RING ---
+def ring_hash(key):
+    return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+class HashRing:
+    def __init__(self, nodes=(), vnodes=100):
+        self.vnodes = vnodes
+        self.nodes = set()
+        self.points = []
+        self.owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            point = ring_hash(f"{node}#{i}")
+            self.owners[point] = node
+            bisect.insort(self.points, point)
+
+    def remove(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for i in range(self.vnodes):
+            point = ring_hash(f"{node}#{i}")
+            if self.owners.get(point) == node:
+                del self.owners[point]
+                self.points.pop(bisect.bisect_left(self.points, point))
+
+    def copy(self):
+        ring = HashRing(vnodes=self.vnodes)
+        ring.nodes = set(self.nodes)
+        ring.points = list(self.points)
+        ring.owners = dict(self.owners)
+        return ring
+
+    def node_for(self, key):
+        if not self.points:
+            return None
+        index = bisect.bisect(self.points, ring_hash(key)) % len(self.points)
+        return self.owners[self.points[index]]
+
+ring = HashRing(ROUTER_NODES, vnodes=ROUTER_VNODES)
+ring_lock = threading.Lock()
+
+# While a handoff runs, pending['ring'] holds the new layout. Webhooks for any
+# ticker whose owner changes wait on handoff_done until the state has moved,
+# and the handoff waits for requests already forwarded for those tickers.
+pending = {'ring': None}
+# Tickers whose state could not be moved stay pinned to the node that still
+# holds it until a later rebalance moves them.
+pins = {}
+in_flight = Counter()
+handoff_done = threading.Condition()
+
+router_stats = {'forwarded': 0, 'errors': 0, 'held': 0, 'handoffs': []}
+
+# --- FORWARDING ---
+_local = threading.local()
+
+def _session():
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def owner(ticker):
+    return pins.get(ticker) or ring.node_for(ticker)
+
+def is_moving(ticker):
+    return pending['ring'] is not None and pending['ring'].node_for(ticker) != owner(ticker)
+
+def begin_forward(ticker):
+    with handoff_done:
+        if is_moving(ticker):
+            router_stats['held'] += 1
+            handoff_done.wait_for(lambda: not is_moving(ticker), timeout=HANDOFF_WAIT_SECONDS)
+        in_flight[ticker] += 1
+        return owner(ticker)
+
+def end_forward(ticker):
+    with handoff_done:
+        in_flight[ticker] -= 1
+        if not in_flight[ticker]:
+            del in_flight[ticker]
+        handoff_done.notify_all()
+
+@app.route('/webhook', methods=['POST'])
+def webhook():
+    data = request.get_json(silent=True) or {}
+    ticker = data.get('ticker', 'UNKNOWN')
+    node = begin_forward(ticker)
+    try:
+        if node is None:
+            return jsonify({'error': 'No backend nodes'}), 503
+        upstream = _session().post(
+            f"{node}/webhook", data=request.get_data(),
+            headers={'Content-Type': request.headers.get('Content-Type', 'application/json')},
+            timeout=ROUTER_TIMEOUT
+        )
+    except requests.RequestException as e:
+        router_stats['errors'] += 1
+        print(f"ROUTER ERROR: {ticker} -> {node}: {str(e)}")
+        return jsonify({'error': f'Backend unavailable: {node}'}), 502
+    finally:
+        end_forward(ticker)
+
+    router_stats['forwarded'] += 1
+    return Response(upstream.content, status=upstream.status_code,
+                    content_type=upstream.headers.get('Content-Type', 'application/json'))
+
+# --- NODE MEMBERSHIP + STATE HANDOFF ---
+def node_tickers(node):
+    response = _session().get(f"{node}/state/tickers", timeout=ROUTER_TIMEOUT)
+    response.raise_for_status()
+    return response.json()['tickers']
+
+def rebalance(new_ring, leaving=None, force=False):
+    # 1. hold new webhooks for tickers that change owner and drain the ones
+    #    already forwarded, 2. ask every current node which tickers it holds,
+    #    3. export each mover from its old owner and import it into the new
+    #    one, 4. swap the ring and release the held webhooks. Movers that fail
+    #    in step 3 are restored and pinned to their old owner, or reported as
+    #    lost if the restore fails too; step 3 always runs to the end. If a
+    #    node can't be listed we don't know what it holds, so nothing moves
+    #    and the ring stays as is; with force a leaving node may be
+    #    unreachable (its state is lost).
+    global ring
+    started = time.time()
+    with handoff_done:
+        pending['ring'] = new_ring
+        handoff_done.wait_for(lambda: not any(is_moving(t) for t in in_flight), timeout=HANDOFF_WAIT_SECONDS)
+
+    moves = {}
+    failed = []
+    failed_nodes = []
+    lost = []
+    swapped = False
+    try:
+        new_pins = {}
+        for node in sorted(ring.nodes | set(pins.values())):
+            try:
+                tickers = node_tickers(node)
+            except requests.RequestException as e:
+                print(f"HANDOFF ERROR: cannot list tickers on {node}: {str(e)}")
+                failed_nodes.append(node)
+                continue
+            for ticker in tickers:
+                target = new_ring.node_for(ticker)
+                if target != node:
+                    moves.setdefault((node, target), []).append(ticker)
+
+        if any(node != leaving or not force for node in failed_nodes):
+            moves = {}
+        else:
+            for (source, target), tickers in moves.items():
+                if target is None:
+                    failed.extend(tickers)
+                    new_pins.update(dict.fromkeys(tickers, source))
+                    continue
+                try:
+                    exported = _session().post(f"{source}/state/export", json={'tickers': tickers}, timeout=ROUTER_TIMEOUT)
+                    exported.raise_for_status()
+                    state = exported.json()
+                except (requests.RequestException, ValueError) as e:
+                    print(f"HANDOFF ERROR: export from {source}: {str(e)}")
+                    failed.extend(tickers)
+                    new_pins.update(dict.fromkeys(tickers, source))
+                    continue
+                try:
+                    _session().post(f"{target}/state/import", json=state, timeout=ROUTER_TIMEOUT).raise_for_status()
+                except requests.RequestException as e:
+                    print(f"HANDOFF ERROR: {source} -> {target}: {str(e)}, restoring on source")
+                    failed.extend(tickers)
+                    try:
+                        _session().post(f"{source}/state/import", json=state, timeout=ROUTER_TIMEOUT).raise_for_status()
+                        new_pins.update(dict.fromkeys(tickers, source))
+                    except requests.RequestException as e:
+                        # neither node holds it now; route by the new ring
+                        print(f"HANDOFF ERROR: restore on {source}: {str(e)}, state lost for {tickers}")
+                        lost.extend(tickers)
+
+            with handoff_done:
+                pins.clear()
+                pins.update(new_pins)
+                ring = new_ring
+            swapped = True
+    finally:
+        with handoff_done:
+            pending['ring'] = None
+            handoff_done.notify_all()
+
+    moved = [t for tickers in moves.values() for t in tickers]
+
+    summary = {
+        'time': datetime.now().isoformat(),
+        'nodes': sorted(ring.nodes),
+        'left': leaving if swapped else None,
+        'swapped': swapped,
+        'moved': len(moved) - len(failed),
+        'failed': failed,
+        'lost': lost,
+        'failed_nodes': failed_nodes,
+        'pinned': dict(pins),
+        'moves': {f"{s} -> {t}": tickers for (s, t), tickers in moves.items()},
+        'seconds': round(time.time() - started, 3)
+    }
+    router_stats['handoffs'].append(summary)
+    return summary
+
+def handoff_response(summary):
+    return jsonify(summary), 200 if summary['swapped'] else 502
+
+@app.route('/nodes', methods=['GET'])
+def list_nodes():
+    return jsonify({'nodes': sorted(ring.nodes), 'vnodes': ring.vnodes, 'pinned': dict(pins)})
+
+@app.route('/nodes/add', methods=['POST'])
+def add_node():
+    node = (request.get_json(silent=True) or {}).get('url', '').rstrip('/')
+    if not node:
+        return jsonify({'error': 'url required'}), 400
+    with ring_lock:
+        new_ring = ring.copy()
+        new_ring.add(node)
+        return handoff_response(rebalance(new_ring))
+
+@app.route('/nodes/remove', methods=['POST'])
+def remove_node():
+    data = request.get_json(silent=True) or {}
+    node = data.get('url', '').rstrip('/')
+    if node not in ring.nodes:
+        return jsonify({'error': f'Unknown node: {node}'}), 404
+    with ring_lock:
+        new_ring = ring.copy()
+        new_ring.remove(node)
+        return handoff_response(rebalance(new_ring, leaving=node, force=bool(data.get('force'))))
+
+@app.route('/route/<ticker>', methods=['GET'])
+def route_for(ticker):
+    return jsonify({'ticker': ticker, 'node': owner(ticker), 'pinned': ticker in pins})
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    nodes = {}
+    for node in sorted(ring.nodes):
+        try:
+            nodes[node] = _session().get(f"{node}/health", timeout=5).json()
+        except requests.RequestException as e:
+            nodes[node] = {'status': 'unreachable', 'error': str(e)}
+    return jsonify({
+        'status': 'healthy' if nodes and all(n.get('status') == 'healthy' for n in nodes.values()) else 'degraded',
+        'timestamp': datetime.now().isoformat(),
+        'forwarded': router_stats['forwarded'],
+        'errors': router_stats['errors'],
+        'held_during_handoff': router_stats['held'],
+        'last_handoff': router_stats['handoffs'][-1] if router_stats['handoffs'] else None,
+        'nodes': nodes
+    })
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8000))
+    print(f"=== AAD-FX Router Starting ===")
+    print(f"Port: {port}")
+    print(f"Nodes: {ROUTER_NODES}")
+    print(f"Virtual Nodes: {ROUTER_VNODES}")
+    print(f"=========================")
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
@@ -0,0 +1,203 @@
+"""Multi-process check of router.py sharding and state handoff on one machine.
+
+Starts the loadtest.py stubs, three main.py backends and the router (each
+its own gunicorn process), opens trades across 30 tickers, then adds a
+fourth backend and removes the first while alerts keep flowing. After each
+step it checks that every ticker lives on exactly the node the ring picks
+and that TP replies still thread under the original signal message. It then
+adds an unreachable node (failed moves must stay pinned to their old owner),
+checks that while it is in the ring no rebalance goes through, and finally
+forces it out.
+
+    python shard_check.py
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+import loadtest
+from router import HashRing
+
+TICKERS = loadtest.make_tickers(30)
+failures = []
+
+
+def check(label, ok, detail=''):
+    print(f"[{'PASS' if ok else 'FAIL'}] {label}{f' - {detail}' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+
+def check_ring_movement():
+    keys = [f'SYM{i}' for i in range(5000)]
+    nodes = [f'http://node{i}' for i in range(3)]
+    before = HashRing(nodes)
+    after = before.copy()
+    after.add('http://node3')
+    moved = [k for k in keys if before.node_for(k) != after.node_for(k)]
+    check('adding a 4th node moves ~1/4 of keys', 0.15 < len(moved) / len(keys) < 0.35, f'{len(moved) / len(keys):.1%}')
+    check('moved keys all go to the new node', all(after.node_for(k) == 'http://node3' for k in moved))
+
+    shrunk = after.copy()
+    shrunk.remove('http://node0')
+    moved = [k for k in keys if after.node_for(k) != shrunk.node_for(k)]
+    check('removing a node only moves its own keys', all(after.node_for(k) == 'http://node0' for k in moved))
+
+
+def start_router(nodes):
+    port = loadtest.free_port()
+    env = dict(os.environ, ROUTER_NODES=','.join(nodes))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', '1', '--threads', '16', '-b', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'router:app'],
+        cwd=loadtest.HERE, env=env, stdout=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            requests.get(f'{url}/nodes', timeout=1)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError('router did not start')
+
+
+def ownership(router_url, nodes):
+    held = {}
+    for node in nodes:
+        for ticker in requests.get(f'{node}/state/tickers', timeout=5).json()['tickers']:
+            held.setdefault(ticker, []).append(node)
+    expected = {t: requests.get(f'{router_url}/route/{t}', timeout=5).json()['node'] for t in TICKERS}
+    return held, expected
+
+
+def check_ownership(label, router_url, nodes):
+    held, expected = ownership(router_url, nodes)
+    misplaced = [t for t in TICKERS if held.get(t) != [expected[t]]]
+    check(f'{label}: every trade lives only on its ring owner', not misplaced, f'misplaced={misplaced}')
+
+
+def threaded_replies(telegram, marker):
+    posts = [p for p in telegram.posts if p.get('text', '').startswith(marker)]
+    threaded = [p for p in posts if 'reply_parameters' in p]
+    return len(posts), len(threaded)
+
+
+def send(router_url, payload):
+    return requests.post(f'{router_url}/webhook', json=payload, timeout=30).status_code
+
+
+def main():
+    check_ring_movement()
+
+    stubs = {
+        'telegram': loadtest.TelegramStub(latency_ms=20),
+        'groq': loadtest.GroqStub(latency_ms=50),
+        'investing': loadtest.CalendarStub('investing', loadtest.INVESTING_HTML),
+        'forexfactory': loadtest.CalendarStub('forexfactory', loadtest.FOREXFACTORY_HTML),
+    }
+    procs = []
+    try:
+        backends = []
+        for _ in range(4):
+            proc, url = loadtest.start_app(1, 4, stubs, {})
+            procs.append(proc)
+            backends.append(url)
+        router_proc, router_url = start_router(backends[:3])
+        procs.append(router_proc)
+        active = backends[:3]
+
+        statuses = [send(router_url, {'alert_type': 'breakout', 'ticker': t, 'tf': '15m', 'direction': 'BUY',
+                                      'price': '1.1000', 'tp': '1.1060', 'sl': '1.0970'}) for t in TICKERS]
+        check('breakouts accepted through the router', all(s == 200 for s in statuses), str(set(statuses)))
+        check_ownership('3 nodes', router_url, active)
+
+        # keep unrelated traffic flowing while the ring changes
+        stop = threading.Event()
+        background = []
+
+        def chatter():
+            while not stop.is_set():
+                for t in TICKERS:
+                    background.append(send(router_url, {'alert_type': 'breakout_due', 'ticker': t, 'tf': '15m', 'direction': 'BUY', 'spread': '0.3'}))
+
+        chatter_thread = threading.Thread(target=chatter, daemon=True)
+        chatter_thread.start()
+
+        summary = requests.post(f'{router_url}/nodes/add', json={'url': backends[3]}, timeout=60).json()
+        active = backends
+        print(f"add node: moved {summary['moved']} tickers in {summary['seconds']}s")
+        check('handoff on add had no failures', not summary['failed'], json.dumps(summary['failed']))
+        check_ownership('4 nodes', router_url, active)
+
+        for t in TICKERS:
+            send(router_url, {'ticker': t, 'hit': 'TP1 HIT', 'price': '1.1030'})
+        total, threaded = threaded_replies(stubs['telegram'], 'TP1')
+        check('TP1 replies thread under the original signal after add', total == len(TICKERS) and threaded == total, f'{threaded}/{total}')
+
+        summary = requests.post(f'{router_url}/nodes/remove', json={'url': backends[0]}, timeout=60).json()
+        active = backends[1:]
+        print(f"remove node: moved {summary['moved']} tickers in {summary['seconds']}s")
+        check('handoff on remove had no failures', not summary['failed'], json.dumps(summary['failed']))
+        held, _ = ownership(router_url, [backends[0]])
+        check('removed node holds no trades', not held, str(sorted(held)))
+        check_ownership('after remove', router_url, active)
+
+        stop.set()
+        chatter_thread.join(timeout=30)
+        check('background traffic saw no errors during handoffs', all(s == 200 for s in background),
+              f'{len(background)} requests, statuses={sorted(set(background))}')
+
+        dead = f'http://127.0.0.1:{loadtest.free_port()}'
+        response = requests.post(f'{router_url}/nodes/add', json={'url': dead}, timeout=60)
+        summary = response.json()
+        moving = [t for key, tickers in summary['moves'].items() if key.endswith(dead) for t in tickers]
+        check('adding an unreachable node swaps the ring but fails its moves',
+              response.status_code == 200 and moving and sorted(summary['failed']) == sorted(moving), json.dumps(summary['failed']))
+        check('failed moves are pinned to their old owner', sorted(summary['pinned']) == sorted(moving), json.dumps(summary['pinned']))
+        check_ownership('with pinned tickers', router_url, active)
+        for t in TICKERS:
+            send(router_url, {'ticker': t, 'hit': 'TP2 HIT', 'price': '1.1045'})
+        total, threaded = threaded_replies(stubs['telegram'], 'TP2')
+        check('TP2 replies thread under the original signal while pinned', total == len(TICKERS) and threaded == total, f'{threaded}/{total}')
+
+        before = requests.get(f'{router_url}/nodes', timeout=5).json()['nodes']
+        response = requests.post(f'{router_url}/nodes/add', json={'url': backends[0]}, timeout=60)
+        check('a node that cannot be listed blocks the rebalance',
+              response.status_code == 502 and response.json()['failed_nodes'] == [dead]
+              and requests.get(f'{router_url}/nodes', timeout=5).json()['nodes'] == before, response.text[:200])
+        response = requests.post(f'{router_url}/nodes/remove', json={'url': dead}, timeout=60)
+        check('removing an unlistable node is refused', response.status_code == 502 and response.json()['failed_nodes'] == [dead]
+              and dead in requests.get(f'{router_url}/nodes', timeout=5).json()['nodes'], response.text[:200])
+        response = requests.post(f'{router_url}/nodes/remove', json={'url': dead, 'force': True}, timeout=60)
+        check('forced removal swaps the ring and clears the pins', response.status_code == 200 and not response.json()['pinned'], response.text[:200])
+        check_ownership('after forced remove', router_url, active)
+
+        for t in TICKERS:
+            send(router_url, {'ticker': t, 'hit': 'TP3 HIT', 'price': '1.1060'})
+        total, threaded = threaded_replies(stubs['telegram'], 'TP3')
+        check('TP3 replies thread under the original signal after remove', total == len(TICKERS) and threaded == total, f'{threaded}/{total}')
+        held, _ = ownership(router_url, backends)
+        check('closed trades are gone everywhere', not held, str(sorted(held)))
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                # gthread can idle out its graceful timeout on keep-alive sockets
+                proc.kill()
+                proc.wait()
+
+    print(f"\n{'FAILED: ' + ', '.join(failures) if failures else 'ALL CHECKS PASSED'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
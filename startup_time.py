@@ -0,0 +1,101 @@
+"""Measure cold start of main.py: import time and time to the first real alerts.
+
+Each run happens in a fresh interpreter so nothing is cached between runs.
+main.py is pointed at the loadtest.py stubs (zero latency) and sent a
+cluster_formed alert, which builds the Telegram client, then a breakout,
+which also builds the Groq client and scrapes the calendars. A second
+cluster_formed shows the steady-state cost. With --warmup every run is
+repeated with warm_up() called before the first alert.
+
+    python startup_time.py              # 5 cold runs
+    python startup_time.py --runs 10 --warmup
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+import loadtest
+
+PROBE = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+c = main.app.test_client()
+r = c.get('/health')
+t2 = time.perf_counter()
+modules = sorted(m for m in ('telebot', 'groq', 'bs4', 'requests') if m in sys.modules)
+if sys.argv[1] == '1':
+    main.warm_up()
+t3 = time.perf_counter()
+
+def alert(payload):
+    started = time.perf_counter()
+    status = c.post('/webhook', json=payload).status_code
+    return status, (time.perf_counter() - started) * 1000
+
+s1, cluster_ms = alert({'alert_type': 'cluster_formed', 'ticker': 'EURUSD', 'tf': '15m',
+                        'direction': 'BUY', 'price': '1.1000', 'spread': '0.18'})
+s2, breakout_ms = alert({'alert_type': 'breakout', 'ticker': 'GBPUSD', 'tf': '15m', 'direction': 'BUY',
+                         'price': '1.2700', 'tp': '1.2760', 'sl': '1.2670'})
+s3, steady_ms = alert({'alert_type': 'cluster_formed', 'ticker': 'AUDUSD', 'tf': '15m',
+                       'direction': 'BUY', 'price': '0.6600', 'spread': '0.18'})
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'first_health_ms': (t2 - t0) * 1000,
+    'warmup_ms': (t3 - t2) * 1000,
+    'first_cluster_ms': cluster_ms,
+    'first_breakout_ms': breakout_ms,
+    'steady_cluster_ms': steady_ms,
+    'status': [r.status_code, s1, s2, s3],
+    'modules': modules,
+}))
+'''
+
+
+def run_once(stubs, warmup):
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE, '1' if warmup else '0'],
+        cwd=loadtest.HERE, env=loadtest.app_env(stubs, {'DESTINATIONS': ''}),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def report(label, runs, keys):
+    print(f"\n=== {label} over {len(runs)} runs ===")
+    for key in keys:
+        values = [r[key] for r in runs]
+        print(f"{key:<18} median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}")
+    print(f"status codes: {runs[0]['status']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warmup', action='store_true', help='also time runs that call warm_up() before the first alert')
+    args = parser.parse_args()
+
+    stubs = {
+        'telegram': loadtest.TelegramStub(),
+        'groq': loadtest.GroqStub(),
+        'investing': loadtest.CalendarStub('investing', loadtest.INVESTING_HTML),
+        'forexfactory': loadtest.CalendarStub('forexfactory', loadtest.FOREXFACTORY_HTML),
+    }
+    alerts = ['first_cluster_ms', 'first_breakout_ms', 'steady_cluster_ms']
+
+    cold = [run_once(stubs, False) for _ in range(args.runs)]
+    report('Cold start', cold, ['import_ms', 'first_health_ms'] + alerts)
+    print(f"heavy modules loaded before the first alert: {cold[0]['modules'] or 'none'}")
+    if args.warmup:
+        warm = [run_once(stubs, True) for _ in range(args.runs)]
+        report('After warm_up()', warm, ['warmup_ms'] + alerts)
+
+    for stub in stubs.values():
+        stub.close()
+
+
+if __name__ == '__main__':
+    main()